@@ -472,6 +472,58 @@ impl AmongUsContract {
         }
     }
 
+    pub fn submit_task_proofs(env: Env, player: Address, proofs: Vec<ProofInput>) {
+        player.require_auth();
+        Self::ensure_not_ended(&env);
+        let state = Self::read_state(&env);
+        if state.phase != symbol_short!("playing") {
+            panic!("task submission not allowed in current phase");
+        }
+        if proofs.is_empty() {
+            panic!("no task proofs submitted");
+        }
+
+        let mut players = Self::read_players(&env);
+        let mut entry = players.get(player.clone()).unwrap_or_else(|| panic!("player not found"));
+        if !entry.alive {
+            panic!("dead player cannot submit tasks");
+        }
+
+        // A nullifier that is already used (a retried task, or a repeat within
+        // this batch) is skipped rather than reverting the fresh proofs with
+        // it; a bad proof still panics and reverts the whole batch.
+        for proof in proofs.iter() {
+            if env
+                .storage()
+                .instance()
+                .has(&DataKey::UsedNullifier(proof.nullifier.clone()))
+            {
+                continue;
+            }
+
+            let mut public_inputs = proof.public_inputs.clone();
+            public_inputs.push_back(proof.nullifier.clone());
+            if !Self::verify_zk_proof(env.clone(), proof.proof_hash, public_inputs) {
+                panic!("invalid task proof");
+            }
+
+            entry.tasks_done += 1;
+            env.storage()
+                .instance()
+                .set(&DataKey::UsedNullifier(proof.nullifier), &true);
+        }
+
+        players.set(player.clone(), entry);
+        Self::write_players(&env, &players);
+
+        let cfg = Self::read_config(&env);
+        let total_tasks = Self::total_tasks(&players);
+        if total_tasks >= cfg.tasks_to_win {
+            Self::set_winner(&env, symbol_short!("crew"));
+            env.events().publish((symbol_short!("winner"), player), symbol_short!("crew"));
+        }
+    }
+
     pub fn submit_kill_proof(env: Env, killer: Address, victim: Address, proof: ProofInput) {
         killer.require_auth();
         Self::ensure_not_ended(&env);
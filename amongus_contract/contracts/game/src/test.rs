@@ -113,6 +113,77 @@ fn submit_vote_with_verifier() {
     assert_eq!(stored.voted_for_hash, BytesN::from_array(&env, &[4; 32]));
 }
 
+#[test]
+fn submit_task_proofs_counts_every_proof() {
+    let env = Env::default();
+    env.mock_all_auths();
+
+    let verifier_id = env.register_contract(None, MockVerifier);
+    let contract_id = env.register_contract(None, AmongUsContract);
+    let client = AmongUsContractClient::new(&env, &contract_id);
+
+    let admin = Address::generate(&env);
+    client.init(&admin, &1);
+    client.set_verifier(&admin, &verifier_id);
+    let players = join_four_players(&env, &client);
+    client.start_game(&admin);
+
+    let player = players.get(0).unwrap();
+    let proofs = Vec::from_array(
+        &env,
+        [
+            ProofInput {
+                proof_hash: BytesN::from_array(&env, &[8; 32]),
+                nullifier: BytesN::from_array(&env, &[6; 32]),
+                public_inputs: Vec::new(&env),
+            },
+            ProofInput {
+                proof_hash: BytesN::from_array(&env, &[9; 32]),
+                nullifier: BytesN::from_array(&env, &[7; 32]),
+                public_inputs: Vec::new(&env),
+            },
+        ],
+    );
+    client.submit_task_proofs(&player, &proofs);
+
+    let stored = client.get_players().get(player).unwrap();
+    assert_eq!(stored.tasks_done, 2);
+}
+
+#[test]
+fn submit_task_proofs_skips_used_nullifiers() {
+    let env = Env::default();
+    env.mock_all_auths();
+
+    let verifier_id = env.register_contract(None, MockVerifier);
+    let contract_id = env.register_contract(None, AmongUsContract);
+    let client = AmongUsContractClient::new(&env, &contract_id);
+
+    let admin = Address::generate(&env);
+    client.init(&admin, &1);
+    client.set_verifier(&admin, &verifier_id);
+    let players = join_four_players(&env, &client);
+    client.start_game(&admin);
+
+    let player = players.get(0).unwrap();
+    let used = ProofInput {
+        proof_hash: BytesN::from_array(&env, &[8; 32]),
+        nullifier: BytesN::from_array(&env, &[6; 32]),
+        public_inputs: Vec::new(&env),
+    };
+    client.submit_task_proof(&player, &used);
+
+    let fresh = ProofInput {
+        proof_hash: BytesN::from_array(&env, &[9; 32]),
+        nullifier: BytesN::from_array(&env, &[7; 32]),
+        public_inputs: Vec::new(&env),
+    };
+    client.submit_task_proofs(&player, &Vec::from_array(&env, [used, fresh.clone(), fresh]));
+
+    let stored = client.get_players().get(player).unwrap();
+    assert_eq!(stored.tasks_done, 2);
+}
+
 #[test]
 fn finalize_meeting_ejects_majority_target() {
     let env = Env::default();
@@ -1090,6 +1090,8 @@ class Game:
         if self.web3_mode:
             self.web3_mode.on_join(self.player_colour, player_name)
         self.runfreeplay()
+        if self.web3_mode:
+            self.web3_mode.close()
         self.web3_mode = None
 
     def _draw_web3_toast(self):
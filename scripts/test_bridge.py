@@ -2,7 +2,8 @@
 Bridge integration test — run with: python3 scripts/test_bridge.py
 Requires the wallet bridge to be running on localhost:8789.
 """
-import sys, threading, time, urllib.request, json
+import sys, time
+from concurrent.futures import ThreadPoolExecutor
 
 sys.path.insert(0, __file__.rsplit("/scripts", 1)[0])
 from web3_client.wallet_bridge import WalletBridgeClient
@@ -11,18 +12,17 @@ c = WalletBridgeClient()
 
 print("=== Bridge Integration Test ===\n")
 
-# 1 — health
-h = c.health()
+# 1-3 — health, connect, account (no wallet linked yet) in one batch
+h, conn, acc = c.batch([
+    {"method": "GET", "path": "/health"},
+    {"method": "POST", "path": "/wallet/connect",
+     "body": {"playerId": "py-test", "displayName": "PythonTest"}},
+    {"method": "GET", "path": "/wallet/account?playerId=py-test"},
+])
 assert h.get("ok"), f"health failed: {h}"
 print("✓ /health")
-
-# 2 — connect
-conn = c.connect_player("py-test", "PythonTest", open_browser=False)
 assert conn.get("ok") and conn.get("connectUrl"), f"connect failed: {conn}"
 print("✓ POST /wallet/connect")
-
-# 3 — account (no wallet linked yet)
-acc = c.get_account_for_player("py-test")
 assert acc.get("ok"), f"account failed: {acc}"
 print("✓ GET /wallet/account")
 
@@ -42,22 +42,18 @@ poll = c.get_sign_request(rid)
 assert poll.get("ok") and poll["request"]["status"] == "pending"
 print("✓ GET /tx/request/:id  status=pending")
 
-# 6 — simulate browser completing the sign in background after 1.5 s
+# 6 — simulate browser completing the sign in background after 1.5 s;
+#     the waiter and the completer share the client's connection pool
 def _complete():
     time.sleep(1.5)
-    body = json.dumps({"signedXdr": "AAAA_SIGNED_XDR", "walletAddress": "GTEST123"}).encode()
-    r = urllib.request.Request(
-        f"http://127.0.0.1:8789/tx/request/{rid}/complete",
-        data=body,
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
-    urllib.request.urlopen(r)
+    return c.complete_sign_request(rid, "AAAA_SIGNED_XDR", "GTEST123")
 
-threading.Thread(target=_complete, daemon=True).start()
+with ThreadPoolExecutor(max_workers=2) as pool:
+    completed = pool.submit(_complete)
 
-# 7 — wait_for_signed_request (poll loop)
-result = c.wait_for_signed_request(rid, timeout_seconds=10, poll_seconds=0.5)
+    # 7 — wait_for_signed_request (poll loop)
+    result = c.wait_for_signed_request(rid, timeout_seconds=10, poll_seconds=0.5)
+    assert completed.result().get("ok"), f"complete failed: {completed.result()}"
 assert result.get("ok"), f"wait failed: {result}"
 assert result["request"]["status"] == "signed"
 assert result["request"]["signedXdr"] == "AAAA_SIGNED_XDR"
@@ -5,11 +5,16 @@ const cors = require('cors');
 const { v4: uuidv4 } = require('uuid');
 const path = require('path');
 const fs = require('fs');
+const zlib = require('zlib');
 
 const PORT = 8789;
 const HOST = '127.0.0.1';
 const DB_PATH = path.join(__dirname, 'bridge-db.json');
 
+// Responses larger than this are gzipped (when the client accepts it) and
+// streamed chunked, so the client can inflate while bytes still arrive.
+const GZIP_RESPONSE_MIN_BYTES = 256 * 1024;
+
 // ---------- JSON-file DB helpers ----------
 
 function readDb() {
@@ -32,50 +37,179 @@ function ensureDb() {
   }
 }
 
+// ---------- long-poll helpers ----------
+
+// requestId -> Set of pending long-poll responders
+const requestWaiters = new Map();
+// playerId -> Set of responders waiting for that wallet to connect
+const accountWaiters = new Map();
+
+// Park a long-poll response until wakeWaiters(key) fires or timeoutMs passes;
+// `done` is called exactly once in either case.
+function addWaiter(waiters, key, timeoutMs, res, done) {
+  let settled = false;
+  const remove = () => {
+    const set = waiters.get(key);
+    if (!set) return;
+    set.delete(finish);
+    if (!set.size) waiters.delete(key);
+  };
+  const finish = () => {
+    if (settled) return;
+    settled = true;
+    clearTimeout(timer);
+    remove();
+    done();
+  };
+  const timer = setTimeout(finish, timeoutMs);
+  if (!waiters.has(key)) waiters.set(key, new Set());
+  waiters.get(key).add(finish);
+  // Client went away before we answered — just drop the waiter.
+  res.on('close', () => {
+    if (settled) return;
+    settled = true;
+    clearTimeout(timer);
+    remove();
+  });
+}
+
+function wakeWaiters(waiters, key) {
+  const set = waiters.get(key);
+  if (!set) return;
+  for (const finish of [...set]) finish();
+}
+
+function waitTimeoutMs(raw, fallbackSeconds, maxSeconds) {
+  const seconds = Number(raw);
+  if (!Number.isFinite(seconds) || seconds < 0) return fallbackSeconds * 1000;
+  return Math.min(seconds, maxSeconds) * 1000;
+}
+
 // ---------- Express app ----------
 
 const app = express();
 
 // Allow the browser signer page (same origin) and Python urllib/requests
 app.use(cors({ origin: '*' }));
-app.use(express.json());
+// Bodies may arrive gzip-encoded (Content-Encoding: gzip); express.json
+// inflates them. The limit leaves room for growing game snapshots.
+app.use(express.json({ limit: '5mb' }));
 
 // Serve signer.html + signer.js from ./public
 app.use(express.static(path.join(__dirname, 'public')));
 
 ensureDb();
 
+// Routes registered through route() are also reachable in-process from
+// POST /bridge/batch.
+const routes = [];
+
+function route(method, pattern, handler) {
+  app[method](pattern, handler);
+  routes.push({ method: method.toUpperCase(), segments: pattern.split('/'), handler });
+}
+
+function matchRoute(method, pathname) {
+  const parts = pathname.split('/');
+  for (const r of routes) {
+    if (r.method !== method || r.segments.length !== parts.length) continue;
+    const params = {};
+    const ok = r.segments.every((seg, i) => {
+      if (seg.startsWith(':')) {
+        params[seg.slice(1)] = decodeURIComponent(parts[i]);
+        return true;
+      }
+      return seg === parts[i];
+    });
+    if (ok) return { handler: r.handler, params };
+  }
+  return null;
+}
+
+// Run one route handler against a minimal req/res pair and resolve with
+// { status, body } instead of writing to a socket.
+function dispatchInProcess(method, rawPath, body) {
+  return new Promise((resolve) => {
+    const url = new URL(rawPath || '/', `http://${HOST}:${PORT}`);
+    let match;
+    try {
+      match = matchRoute(String(method || 'GET').toUpperCase(), url.pathname);
+    } catch (err) {
+      // decodeURIComponent throws URIError on a malformed % escape
+      return resolve({ status: 400, body: { ok: false, error: 'malformed_path' } });
+    }
+    if (!match) return resolve({ status: 404, body: { ok: false, error: 'route_not_found' } });
+
+    let status = 200;
+    const res = {
+      status(code) { status = code; return res; },
+      json(payload) { resolve({ status, body: payload }); return res; },
+      on() { return res; },
+    };
+    const req = {
+      body: body || {},
+      query: Object.fromEntries(url.searchParams),
+      params: match.params,
+    };
+    const fail = (err) => resolve({ status: 500, body: { ok: false, error: err.message } });
+    try {
+      Promise.resolve(match.handler(req, res)).catch(fail);
+    } catch (err) {
+      fail(err);
+    }
+  });
+}
+
 // ----------------------------------------------------------------
 // GET /health
 // ----------------------------------------------------------------
-app.get('/health', (_req, res) => {
+route('get', '/health', (_req, res) => {
   res.json({ ok: true, ts: Date.now() });
 });
 
-// ----------------------------------------------------------------
-// GET /wallet/account?playerId=
-// ----------------------------------------------------------------
-app.get('/wallet/account', (req, res) => {
-  const playerId = req.query.playerId || '__default__';
-  const db = readDb();
-  const session = db.sessions[playerId];
+function accountPayload(playerId, session) {
   if (session && session.address) {
-    return res.json({
+    return {
       ok: true,
       connected: true,
       address: session.address,
       network: session.network || null,
       playerId,
-    });
+    };
   }
-  res.json({ ok: true, connected: false, playerId });
+  return { ok: true, connected: false, playerId };
+}
+
+// ----------------------------------------------------------------
+// GET /wallet/account?playerId=
+// ----------------------------------------------------------------
+route('get', '/wallet/account', (req, res) => {
+  const playerId = req.query.playerId || '__default__';
+  const db = readDb();
+  res.json(accountPayload(playerId, db.sessions[playerId]));
+});
+
+// ----------------------------------------------------------------
+// GET /wallet/account/wait?playerId=&timeout=30
+// Long-poll: answers as soon as the player's wallet is connected, or with the
+// still-disconnected account once `timeout` seconds (max 60) have passed.
+// ----------------------------------------------------------------
+route('get', '/wallet/account/wait', (req, res) => {
+  const playerId = req.query.playerId || '__default__';
+  const session = readDb().sessions[playerId];
+  if (session && session.address) return res.json(accountPayload(playerId, session));
+
+  addWaiter(accountWaiters, playerId, waitTimeoutMs(req.query.timeout, 30, 60), res, () => {
+    res.json(accountPayload(playerId, readDb().sessions[playerId]));
+  });
 });
 
 // ----------------------------------------------------------------
 // POST /wallet/connect   { playerId?, displayName? }
-// Returns a connectUrl the Python client opens in the browser
+// Returns a connectUrl the Python client opens in the browser, plus the
+// player's current account (same shape as GET /wallet/account)
 // ----------------------------------------------------------------
-app.post('/wallet/connect', (req, res) => {
+route('post', '/wallet/connect', (req, res) => {
   const { playerId, displayName } = req.body || {};
   const key = playerId || '__default__';
 
@@ -97,14 +231,14 @@ app.post('/wallet/connect', (req, res) => {
     writeDb(db);
   }
 
-  res.json({ ok: true, connectUrl, playerId: key });
+  res.json({ ok: true, connectUrl, playerId: key, account: accountPayload(key, db.sessions[key]) });
 });
 
 // ----------------------------------------------------------------
 // POST /wallet/session/update   { playerId, address, network }
 // Called by the browser signer page after a wallet connects
 // ----------------------------------------------------------------
-app.post('/wallet/session/update', (req, res) => {
+route('post', '/wallet/session/update', (req, res) => {
   const { playerId, address, network } = req.body || {};
   if (!address) return res.status(400).json({ ok: false, error: 'address_required' });
 
@@ -118,6 +252,7 @@ app.post('/wallet/session/update', (req, res) => {
     connectedAt: Date.now(),
   };
   writeDb(db);
+  wakeWaiters(accountWaiters, key);
 
   console.log(`[bridge] Session updated — player=${key} address=${address}`);
   res.json({ ok: true });
@@ -127,7 +262,7 @@ app.post('/wallet/session/update', (req, res) => {
 // POST /tx/request   { playerId, action, xdr, networkPassphrase, metadata? }
 // Creates a signing request + returns a signerUrl to open in browser
 // ----------------------------------------------------------------
-app.post('/tx/request', (req, res) => {
+route('post', '/tx/request', (req, res) => {
   const { playerId, action, xdr, networkPassphrase, metadata } = req.body || {};
   if (!xdr) return res.status(400).json({ ok: false, error: 'xdr_required' });
 
@@ -158,18 +293,34 @@ app.post('/tx/request', (req, res) => {
 // ----------------------------------------------------------------
 // GET /tx/request/:id
 // ----------------------------------------------------------------
-app.get('/tx/request/:id', (req, res) => {
+route('get', '/tx/request/:id', (req, res) => {
   const db = readDb();
   const request = db.requests[req.params.id];
   if (!request) return res.status(404).json({ ok: false, error: 'request_not_found' });
   res.json({ ok: true, request });
 });
 
+// ----------------------------------------------------------------
+// GET /tx/request/:id/wait?timeout=30
+// Long-poll: answers as soon as the request leaves 'pending', or with the
+// still-pending request once `timeout` seconds (max 60) have passed.
+// ----------------------------------------------------------------
+route('get', '/tx/request/:id/wait', (req, res) => {
+  const id = req.params.id;
+  const request = readDb().requests[id];
+  if (!request) return res.status(404).json({ ok: false, error: 'request_not_found' });
+  if (request.status !== 'pending') return res.json({ ok: true, request });
+
+  addWaiter(requestWaiters, id, waitTimeoutMs(req.query.timeout, 30, 60), res, () => {
+    res.json({ ok: true, request: readDb().requests[id] });
+  });
+});
+
 // ----------------------------------------------------------------
 // POST /tx/request/:id/complete   { signedXdr, walletAddress }
 // Called by the browser signer page after the user approves
 // ----------------------------------------------------------------
-app.post('/tx/request/:id/complete', (req, res) => {
+route('post', '/tx/request/:id/complete', (req, res) => {
   const { signedXdr, walletAddress } = req.body || {};
   if (!signedXdr) return res.status(400).json({ ok: false, error: 'signedXdr_required' });
 
@@ -182,6 +333,7 @@ app.post('/tx/request/:id/complete', (req, res) => {
   request.walletAddress = walletAddress || null;
   request.updatedAt = Date.now();
   writeDb(db);
+  wakeWaiters(requestWaiters, req.params.id);
 
   console.log(`[bridge] Request signed — id=${req.params.id}`);
   res.json({ ok: true });
@@ -191,7 +343,7 @@ app.post('/tx/request/:id/complete', (req, res) => {
 // POST /tx/request/:id/reject   { reason? }
 // Called by the browser signer page on user rejection
 // ----------------------------------------------------------------
-app.post('/tx/request/:id/reject', (req, res) => {
+route('post', '/tx/request/:id/reject', (req, res) => {
   const { reason } = req.body || {};
 
   const db = readDb();
@@ -202,6 +354,7 @@ app.post('/tx/request/:id/reject', (req, res) => {
   request.error = reason || 'user_rejected';
   request.updatedAt = Date.now();
   writeDb(db);
+  wakeWaiters(requestWaiters, req.params.id);
 
   console.log(`[bridge] Request rejected — id=${req.params.id}`);
   res.json({ ok: true });
@@ -210,25 +363,104 @@ app.post('/tx/request/:id/reject', (req, res) => {
 // ----------------------------------------------------------------
 // POST /game/snapshot   { playerId, snapshot }
 // ----------------------------------------------------------------
-app.post('/game/snapshot', (req, res) => {
+route('post', '/game/snapshot', (req, res) => {
   const { playerId, snapshot } = req.body || {};
   if (!playerId) return res.status(400).json({ ok: false, error: 'playerId_required' });
 
   const db = readDb();
-  db.snapshots[playerId] = { playerId, snapshot, savedAt: Date.now() };
+  const rev = ((db.snapshots[playerId] || {}).rev || 0) + 1;
+  db.snapshots[playerId] = { playerId, snapshot, rev, savedAt: Date.now() };
   writeDb(db);
 
-  res.json({ ok: true });
+  res.json({ ok: true, rev });
+});
+
+// ----------------------------------------------------------------
+// POST /game/snapshot/batch   { snapshots: [{ playerId, snapshot }, ...] }
+// Stores several snapshots with a single DB write; returns { ok, revs }.
+// ----------------------------------------------------------------
+route('post', '/game/snapshot/batch', (req, res) => {
+  const { snapshots } = req.body || {};
+  if (!Array.isArray(snapshots)) return res.status(400).json({ ok: false, error: 'snapshots_array_required' });
+  if (snapshots.some((s) => !s || !s.playerId)) {
+    return res.status(400).json({ ok: false, error: 'playerId_required' });
+  }
+
+  const db = readDb();
+  const revs = {};
+  const savedAt = Date.now();
+  for (const { playerId, snapshot } of snapshots) {
+    const rev = ((db.snapshots[playerId] || {}).rev || 0) + 1;
+    db.snapshots[playerId] = { playerId, snapshot, rev, savedAt };
+    revs[playerId] = rev;
+  }
+  writeDb(db);
+
+  res.json({ ok: true, revs });
+});
+
+// RFC 7386 JSON merge patch: objects merge recursively, null deletes a key,
+// anything else replaces the target value.
+function applyMergePatch(target, patch) {
+  if (patch === null || typeof patch !== 'object' || Array.isArray(patch)) return patch;
+  const isObject = target !== null && typeof target === 'object' && !Array.isArray(target);
+  const out = isObject ? { ...target } : {};
+  for (const [key, value] of Object.entries(patch)) {
+    if (value === null) delete out[key];
+    else out[key] = applyMergePatch(out[key], value);
+  }
+  return out;
+}
+
+// ----------------------------------------------------------------
+// POST /game/snapshot/delta   { playerId, baseRev, patch }
+// Applies a JSON merge patch on top of revision `baseRev`. Answers 409
+// when the stored revision differs so the client resends the full snapshot.
+// ----------------------------------------------------------------
+route('post', '/game/snapshot/delta', (req, res) => {
+  const { playerId, baseRev, patch } = req.body || {};
+  if (!playerId) return res.status(400).json({ ok: false, error: 'playerId_required' });
+
+  const db = readDb();
+  const current = db.snapshots[playerId];
+  if (!current || current.rev !== baseRev) {
+    return res.status(409).json({ ok: false, error: 'base_rev_mismatch', rev: current ? current.rev || null : null });
+  }
+
+  const rev = current.rev + 1;
+  db.snapshots[playerId] = {
+    playerId,
+    snapshot: applyMergePatch(current.snapshot, patch),
+    rev,
+    savedAt: Date.now(),
+  };
+  writeDb(db);
+
+  res.json({ ok: true, rev });
 });
 
+function sendJsonMaybeGzip(req, res, payload) {
+  const accepts = (req.headers && req.headers['accept-encoding']) || '';
+  // In-process batch dispatch has no socket to stream to.
+  if (!res.setHeader || !/\bgzip\b/.test(accepts)) return res.json(payload);
+  const body = Buffer.from(JSON.stringify(payload));
+  if (body.length < GZIP_RESPONSE_MIN_BYTES) return res.json(payload);
+  res.setHeader('Content-Type', 'application/json; charset=utf-8');
+  res.setHeader('Content-Encoding', 'gzip');
+  res.setHeader('Vary', 'Accept-Encoding');
+  const gz = zlib.createGzip({ level: 1 });
+  gz.pipe(res);
+  gz.end(body);
+}
+
 // ----------------------------------------------------------------
 // GET /game/snapshot/:playerId
 // ----------------------------------------------------------------
-app.get('/game/snapshot/:playerId', (req, res) => {
+route('get', '/game/snapshot/:playerId', (req, res) => {
   const db = readDb();
   const snap = db.snapshots[req.params.playerId];
   if (!snap) return res.json({ ok: true, found: false, snapshot: null });
-  res.json({ ok: true, found: true, ...snap });
+  sendJsonMaybeGzip(req, res, { ok: true, found: true, ...snap });
 });
 
 // ----------------------------------------------------------------
@@ -236,7 +468,7 @@ app.get('/game/snapshot/:playerId', (req, res) => {
 // Convenience: creates a sign request and returns the signerUrl.
 // Python must open the url and poll tx/request/:id as usual.
 // ----------------------------------------------------------------
-app.post('/wallet/sign', (req, res) => {
+route('post', '/wallet/sign', (req, res) => {
   const { xdr, networkPassphrase } = req.body || {};
   if (!xdr) return res.status(400).json({ ok: false, error: 'xdr_required' });
 
@@ -267,7 +499,7 @@ app.post('/wallet/sign', (req, res) => {
 // POST /wallet/sign-and-submit   { xdr, networkPassphrase, rpcUrl }
 // Submits an already-signed XDR to the Soroban RPC node.
 // ----------------------------------------------------------------
-app.post('/wallet/sign-and-submit', async (req, res) => {
+route('post', '/wallet/sign-and-submit', async (req, res) => {
   const { xdr, networkPassphrase, rpcUrl } = req.body || {};
   if (!xdr || !rpcUrl) {
     return res.status(400).json({ ok: false, error: 'xdr_and_rpcUrl_required' });
@@ -296,6 +528,22 @@ app.post('/wallet/sign-and-submit', async (req, res) => {
   }
 });
 
+// ----------------------------------------------------------------
+// POST /bridge/batch   { requests: [{ method, path, body? }, ...] }
+// Runs each sub-request in order against the routes above and returns
+// { ok, responses: [{ status, body }, ...] } aligned with the input.
+// ----------------------------------------------------------------
+app.post('/bridge/batch', async (req, res) => {
+  const { requests } = req.body || {};
+  if (!Array.isArray(requests)) return res.status(400).json({ ok: false, error: 'requests_array_required' });
+
+  const responses = [];
+  for (const sub of requests) {
+    responses.push(await dispatchInProcess(sub.method, sub.path, sub.body));
+  }
+  res.json({ ok: true, responses });
+});
+
 // ----------------------------------------------------------------
 app.listen(PORT, HOST, () => {
   console.log(`\n  Wallet bridge listening on http://${HOST}:${PORT}`);
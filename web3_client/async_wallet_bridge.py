@@ -0,0 +1,264 @@
+"""
+async_wallet_bridge.py
+Asyncio counterpart of WalletBridgeClient for code running inside an event
+loop (async game loops, web servers).
+
+Prerequisites
+-------------
+- aiohttp >= 3.8  (pip install aiohttp)
+
+Every method mirrors WalletBridgeClient but is awaitable, so a long signer
+wait no longer pins a thread and several players can be awaited together
+with asyncio.gather(). All calls share one keep-alive TCPConnector.
+"""
+
+import asyncio
+import random
+import time
+import webbrowser
+
+import aiohttp
+
+
+class AsyncWalletBridgeClient:
+    def __init__(self, base_url="http://127.0.0.1:8789", limit=20, keepalive_timeout=30):
+        self.base_url = base_url.rstrip("/")
+        self._limit = limit
+        self._keepalive_timeout = keepalive_timeout
+        self._session = None   # created lazily inside the running loop
+        self._closed = False
+        self._health_cache = (0.0, None)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _http(self):
+        if self._closed:
+            raise RuntimeError("AsyncWalletBridgeClient is closed")
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self._limit, keepalive_timeout=self._keepalive_timeout)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def _request(self, method, path, payload=None, timeout=5):
+        url = f"{self.base_url}{path}"
+        async with self._http().request(
+            method,
+            url,
+            json=payload,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        ) as resp:
+            resp.raise_for_status()
+            return await resp.json()
+
+    async def _get_longpoll(self, path, timeout):
+        """
+        GET a long-poll route. Returns None when the bridge lacks the route:
+        a 404 that isn't one of the bridge's own JSON errors.
+        """
+        async with self._http().get(
+            f"{self.base_url}{path}",
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        ) as resp:
+            if resp.status == 404:
+                try:
+                    payload = await resp.json(content_type=None)
+                except ValueError:
+                    return None
+                return payload if isinstance(payload, dict) and "error" in payload else None
+            resp.raise_for_status()
+            return await resp.json()
+
+    async def _get(self, path):
+        return await self._request("GET", path, timeout=5)
+
+    async def _post(self, path, payload):
+        return await self._request("POST", path, payload, timeout=10)
+
+    @staticmethod
+    def _open_browser(url):
+        # webbrowser.open may spawn a process; keep it off the event loop.
+        asyncio.get_running_loop().run_in_executor(None, webbrowser.open, url)
+
+    async def close(self):
+        self._closed = True   # a retry loop still running must not reopen a session
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def health(self):
+        return await self._get("/health")
+
+    async def preflight(self, ttl=5.0):
+        """Async version of WalletBridgeClient.preflight."""
+        expiry, cached = self._health_cache
+        if time.monotonic() < expiry:
+            return cached
+        payload = await self.health()
+        if payload.get("ok", False):
+            self._health_cache = (time.monotonic() + ttl, payload)
+        return payload
+
+    async def get_account(self):
+        return await self._get("/wallet/account")
+
+    async def get_account_for_player(self, player_id):
+        return await self._get(f"/wallet/account?playerId={player_id}")
+
+    async def await_account_connection(self, player_id, timeout=60, poll_seconds=2.0):
+        """Async version of WalletBridgeClient.await_account_connection."""
+        deadline = time.monotonic() + timeout
+        while True:
+            window = max(0.0, min(deadline - time.monotonic(), 60.0))
+            try:
+                account = await self._request(
+                    "GET",
+                    f"/wallet/account/wait?playerId={player_id}&timeout={window:.1f}",
+                    timeout=window + 5,
+                )
+            except aiohttp.ClientResponseError as exc:
+                if exc.status != 404:
+                    raise
+                break
+            if account.get("connected") or time.monotonic() >= deadline:
+                return account
+        # Bridge without /wallet/account/wait
+        while True:
+            account = await self.get_account_for_player(player_id)
+            remaining = deadline - time.monotonic()
+            if account.get("connected") or remaining <= 0:
+                return account
+            await asyncio.sleep(min(poll_seconds, remaining))
+
+    async def connect(self):
+        return await self._post("/wallet/connect", {})
+
+    async def connect_player(self, player_id, display_name=None, open_browser=True):
+        payload = {"playerId": player_id, "displayName": display_name}
+        response = await self._post("/wallet/connect", payload)
+        already_connected = response.get("account", {}).get("connected")
+        if open_browser and response.get("connectUrl") and not already_connected:
+            self._open_browser(response["connectUrl"])
+        return response
+
+    async def sign_xdr(self, xdr, network_passphrase):
+        return await self._post(
+            "/wallet/sign",
+            {
+                "xdr": xdr,
+                "networkPassphrase": network_passphrase,
+            },
+        )
+
+    async def create_sign_request(self, player_id, action, xdr, network_passphrase, metadata=None, open_browser=True):
+        response = await self._post(
+            "/tx/request",
+            {
+                "playerId": player_id,
+                "action": action,
+                "xdr": xdr,
+                "networkPassphrase": network_passphrase,
+                "metadata": metadata or {},
+            },
+        )
+        if open_browser and response.get("signerUrl"):
+            self._open_browser(response["signerUrl"])
+        return response
+
+    async def get_sign_request(self, request_id):
+        return await self._get(f"/tx/request/{request_id}")
+
+    async def complete_sign_request(self, request_id, signed_xdr, wallet_address=None):
+        return await self._post(
+            f"/tx/request/{request_id}/complete",
+            {
+                "signedXdr": signed_xdr,
+                "walletAddress": wallet_address,
+            },
+        )
+
+    async def wait_for_signed_request(self, request_id, timeout_seconds=120, poll_seconds=1.5, max_poll_seconds=5.0):
+        """Async version of WalletBridgeClient.wait_for_signed_request (same backoff)."""
+        deadline = time.monotonic() + timeout_seconds
+        delay = poll_seconds
+        while True:
+            growth = 1.5
+            try:
+                payload = await self.get_sign_request(request_id)
+            except aiohttp.ClientResponseError:
+                raise
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                # Bridge briefly unreachable (e.g. restarting) or slow to
+                # answer; ClientTimeout raises asyncio.TimeoutError, which
+                # isn't a ClientError before Python 3.11 — back off harder.
+                payload = None
+                growth = 2.0
+            if payload is not None:
+                if not payload.get("ok"):
+                    return payload
+                status = payload["request"].get("status")
+                if status in {"signed", "rejected"}:
+                    return payload
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return {"ok": False, "error": "sign_request_timeout", "requestId": request_id}
+            # Never sleep past the deadline; the last poll lands right on it.
+            await asyncio.sleep(min(delay * random.uniform(0.9, 1.1), remaining))
+            delay = min(delay * growth, max_poll_seconds)
+
+    async def wait_for_signed_request_longpoll(self, request_id, timeout_seconds=120, wait_seconds=30):
+        """Async version of WalletBridgeClient.wait_for_signed_request_longpoll."""
+        deadline = time.monotonic() + timeout_seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return {"ok": False, "error": "sign_request_timeout", "requestId": request_id}
+            window = min(wait_seconds, remaining)
+            payload = await self._get_longpoll(
+                f"/tx/request/{request_id}/wait?timeout={window:.1f}",
+                timeout=window + 5,
+            )
+            if payload is None:   # bridge without /wait
+                return await self.wait_for_signed_request(request_id, timeout_seconds=remaining)
+            if not payload.get("ok"):
+                return payload
+            if payload["request"].get("status") in {"signed", "rejected"}:
+                return payload
+
+    async def save_snapshot(self, player_id, snapshot):
+        return await self._post(
+            "/game/snapshot",
+            {
+                "playerId": player_id,
+                "snapshot": snapshot,
+            },
+        )
+
+    async def load_snapshot(self, player_id):
+        return await self._get(f"/game/snapshot/{player_id}")
+
+    async def sign_and_submit(self, xdr, network_passphrase, rpc_url):
+        return await self._post(
+            "/wallet/sign-and-submit",
+            {
+                "xdr": xdr,
+                "networkPassphrase": network_passphrase,
+                "rpcUrl": rpc_url,
+            },
+        )
+
+    async def batch(self, requests):
+        """Async version of WalletBridgeClient.batch."""
+        response = await self._post("/bridge/batch", {"requests": requests})
+        return [item["body"] for item in response["responses"]]
+
+    async def safe_connect(self):
+        try:
+            return await self.connect()
+        except aiohttp.ClientResponseError as e:
+            return {"ok": False, "reason": "bridge_not_healthy", "detail": str(e)}
+        except aiohttp.ClientConnectionError as e:
+            return {"ok": False, "reason": "bridge_unreachable", "detail": str(e)}
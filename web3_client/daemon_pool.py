@@ -0,0 +1,69 @@
+"""Fixed-size pool of daemon worker threads with a ThreadPoolExecutor-style submit()."""
+
+import queue
+import threading
+from concurrent.futures import Future
+
+
+class DaemonPool:
+    """
+    Unlike ThreadPoolExecutor, interpreter exit doesn't wait for jobs that are
+    still running: web3 jobs can block on a wallet signature for minutes, and
+    quitting the game must not hang on them.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = "daemon-pool"):
+        self._jobs = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._workers = []
+        self._max_workers = max_workers
+        self._prefix = thread_name_prefix
+        self._idle = 0
+
+    def _work(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            fut, fn, args, kwargs = job
+            if fut.set_running_or_notify_cancel():
+                try:
+                    fut.set_result(fn(*args, **kwargs))
+                except BaseException as exc:
+                    fut.set_exception(exc)
+            with self._lock:
+                self._idle += 1
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        fut = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("cannot submit to a closed DaemonPool")
+            self._jobs.put((fut, fn, args, kwargs))
+            # Start workers lazily, only when none is free to take the job.
+            if self._idle:
+                self._idle -= 1
+            elif len(self._workers) < self._max_workers:
+                worker = threading.Thread(
+                    target=self._work,
+                    name=f"{self._prefix}_{len(self._workers)}",
+                    daemon=True,
+                )
+                self._workers.append(worker)
+                worker.start()
+        return fut
+
+    def shutdown(self):
+        """Cancel queued jobs; workers exit once their current job returns."""
+        with self._lock:
+            self._closed = True
+            while True:
+                try:
+                    job = self._jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if job is not None:
+                    job[0].cancel()
+            for _ in self._workers:
+                self._jobs.put(None)
@@ -0,0 +1,36 @@
+"""Share one in-flight call between concurrent callers asking for the same key."""
+
+import threading
+from concurrent.futures import Future
+
+
+class InflightCalls:
+    """
+    Callers that ask for a key while an earlier call for that key is still
+    running wait for its result (or exception) instead of issuing their own.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def run(self, key, fn, *args, **kwargs):
+        with self._lock:
+            fut = self._calls.get(key)
+            owner = fut is None
+            if owner:
+                fut = Future()
+                self._calls[key] = fut
+        if not owner:
+            return fut.result()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as exc:
+            fut.set_exception(exc)
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
@@ -1,3 +1,5 @@
+import time
+
 from web3_client.wallet_bridge import WalletBridgeClient
 
 
@@ -6,13 +8,28 @@ class Web3GameplayBridge:
         self.player_id = player_id
         self.display_name = display_name
         self.wallet = WalletBridgeClient(bridge_url)
+        # (expiry on time.monotonic(), last connected account seen from the bridge)
+        self._account_cache = (0.0, None)
 
-    def ensure_wallet_connected(self):
+    def ensure_wallet_connected(self, ttl=5.0):
+        """
+        Return the player's account, opening the connect page if needed.
+        A connected account is reused for `ttl` seconds, so a disconnect or
+        wallet switch on the bridge is picked up within that window.
+        """
+        expiry, cached = self._account_cache
+        if cached is not None and time.monotonic() < expiry:
+            return cached
         account = self.wallet.get_account_for_player(self.player_id)
+        if not account.get("connected"):
+            response = self.wallet.connect_player(self.player_id, self.display_name, open_browser=True)
+            # Newer bridges embed the account; older ones need a second GET.
+            account = response.get("account") or self.wallet.get_account_for_player(self.player_id)
         if account.get("connected"):
-            return account
-        self.wallet.connect_player(self.player_id, self.display_name, open_browser=True)
-        return self.wallet.get_account_for_player(self.player_id)
+            self._account_cache = (time.monotonic() + ttl, account)
+        else:
+            self._account_cache = (0.0, None)
+        return account
 
     def sign_action_xdr(self, action, xdr, network_passphrase, metadata=None, timeout_seconds=120):
         req = self.wallet.create_sign_request(
@@ -25,14 +42,17 @@ class Web3GameplayBridge:
         )
         request_id = req.get("requestId")
         if not request_id:
+            self._account_cache = (0.0, None)   # re-check the wallet next time
             return {"ok": False, "error": "failed_to_create_sign_request", "raw": req}
 
-        result = self.wallet.wait_for_signed_request(request_id, timeout_seconds=timeout_seconds)
+        result = self.wallet.wait_for_signed_request_longpoll(request_id, timeout_seconds=timeout_seconds)
         if not result.get("ok"):
+            self._account_cache = (0.0, None)
             return result
 
         request_obj = result.get("request", {})
         if request_obj.get("status") != "signed":
+            self._account_cache = (0.0, None)
             return {"ok": False, "error": request_obj.get("error", "not_signed"), "request": request_obj}
 
         return {
@@ -0,0 +1,406 @@
+"""
+proof_backend.py
+----------------
+Proof generation backends for the Noir circuits in noir_circuits/.
+
+  - NargoBackend   (default) the persistent WEB3_PROVER_CMD worker if set,
+                   else one-shot `nargo prove` through Prover.toml
+  - NoirPyBackend  opt-in in-process prover through a `noir_py` extension
+  - IcicleBackend  opt-in GPU prover loaded with ctypes from a shared library
+
+Select with WEB3_PROOF_BACKEND=nargo|noir_py|icicle; see default_backend().
+"""
+
+import base64
+import ctypes
+import importlib
+import json
+import os
+import queue
+import shlex
+import subprocess
+import threading
+from functools import lru_cache
+from typing import NamedTuple, Optional, Protocol
+
+
+# ── circuits ──────────────────────────────────────────────────────────────────
+
+class Circuit(NamedTuple):
+    """A circuit's name and the fixed paths nargo reads and writes for it."""
+    name: str
+    dir: str
+    prover_toml: str
+    proof: str
+
+
+def circuit_paths(circuits_root: str, name: str) -> Circuit:
+    circuit_dir = os.path.abspath(os.path.join(circuits_root, name))
+    return Circuit(
+        name=name,
+        dir=circuit_dir,
+        prover_toml=os.path.join(circuit_dir, "Prover.toml"),
+        # nargo writes proofs/<package name>.proof; package name == dir name
+        proof=os.path.join(circuit_dir, "proofs", f"{name}.proof"),
+    )
+
+
+# Input order per circuit: Prover.toml line order and packed witness order.
+CIRCUIT_FIELDS = {
+    "role_proof": ("role_secret", "player_secret", "round_id", "role_commitment", "action_nullifier"),
+    "task_proof": ("task_id", "task_secret", "player_secret", "round_id", "task_commitment", "action_nullifier"),
+    "kill_proof": ("dx", "dy", "cooldown_ok", "role_flag", "player_secret", "round_id",
+                   "kill_commitment", "action_nullifier"),
+    "vote_proof": ("target_index", "player_secret", "meeting_round", "vote_commitment", "action_nullifier"),
+}
+
+
+class ProofBackend(Protocol):
+    """Turns one circuit's inputs (field name -> int) into proof bytes."""
+
+    name: str
+
+    def available(self) -> bool:
+        """True if prove() can be expected to work (checked lazily, cheap after first call)."""
+
+    def prove(self, circuit: Circuit, inputs: dict) -> Optional[bytes]:
+        """Return the proof bytes, or None if proving failed."""
+
+
+# ── nargo ─────────────────────────────────────────────────────────────────────
+
+# nargo's output is never parsed, so it goes to /dev/null rather than through
+# pipes Python has to drain. WEB3_DEBUG=1 passes it through to the terminal.
+_NARGO_OUTPUT = None if os.environ.get("WEB3_DEBUG") else subprocess.DEVNULL
+
+@lru_cache(maxsize=1)
+def _nargo_available() -> bool:
+    """
+    Return True if nargo CLI is found on PATH.
+    Probed once per process; call _nargo_available.cache_clear() to re-probe
+    (e.g. after installing nargo, or between tests that fake PATH).
+    """
+    try:
+        result = subprocess.run(
+            ["nargo", "--version"],
+            stdout=_NARGO_OUTPUT, stderr=_NARGO_OUTPUT, timeout=5,
+        )
+        return result.returncode == 0
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return False
+
+
+# Prover.toml and proofs/ are per circuit directory, so concurrent CLI proofs
+# of the same circuit take turns; different circuits still run in parallel.
+_circuit_locks: dict = {}
+_circuit_locks_guard = threading.Lock()
+
+
+def _circuit_lock(circuit: Circuit) -> threading.Lock:
+    with _circuit_locks_guard:
+        return _circuit_locks.setdefault(circuit.dir, threading.Lock())
+
+
+def _run_nargo_cli(circuit: Circuit, prover_toml_content: bytes) -> Optional[bytes]:
+    """
+    Write Prover.toml, run `nargo prove`, read back the proof bytes.
+    Returns raw proof bytes, or None on failure.
+    """
+    with _circuit_lock(circuit):
+        return _run_nargo_cli_locked(circuit, prover_toml_content)
+
+
+def _run_nargo_cli_locked(circuit: Circuit, prover_toml_content: bytes) -> Optional[bytes]:
+    try:
+        fd = os.open(circuit.prover_toml, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, prover_toml_content)
+        finally:
+            os.close(fd)
+        result = subprocess.run(
+            ["nargo", "prove"],
+            cwd=circuit.dir,
+            stdout=_NARGO_OUTPUT, stderr=_NARGO_OUTPUT, timeout=60,
+        )
+        if result.returncode != 0:
+            return None
+        with open(circuit.proof, "rb") as f:
+            return f.read()
+    except Exception:
+        return None
+
+
+# Seconds to wait for one worker reply, as for a one-shot `nargo prove`.
+_WORKER_TIMEOUT = 60
+
+
+class _NargoWorker:
+    """
+    Long-lived prover process (WEB3_PROVER_CMD) that keeps circuits and the
+    SRS resident across proofs. nargo has no server mode of its own, so the
+    command is any wrapper speaking one JSON object per line on stdin/stdout:
+
+        -> {"op": "ping"}                                   <- {"ok": true}
+        -> {"op": "prove", "circuit": name, "dir": path, "inputs": {...}}
+        <- {"ok": true, "proof": "<base64>"}  |  {"ok": false, "error": "..."}
+    """
+
+    def __init__(self, cmd: str):
+        self._argv = shlex.split(cmd)
+        self._proc: Optional[subprocess.Popen] = None
+        self._lines: Optional[queue.SimpleQueue] = None   # stdout, fed by a reader thread
+        self._lock = threading.Lock()   # one request/response on the pipe at a time
+        self.broken = False
+
+    @staticmethod
+    def _read_lines(stdout, lines: queue.SimpleQueue):
+        for line in stdout:
+            lines.put(line)
+        lines.put("")   # EOF
+
+    def _call(self, message: dict) -> dict:
+        self._proc.stdin.write(json.dumps(message) + "\n")
+        self._proc.stdin.flush()
+        # Read through the queue so a wedged worker can't block the caller
+        # (and every proof queued behind the lock) forever.
+        try:
+            line = self._lines.get(timeout=_WORKER_TIMEOUT)
+        except queue.Empty:
+            raise RuntimeError(f"prover worker gave no reply in {_WORKER_TIMEOUT}s") from None
+        if not line:
+            raise RuntimeError("prover worker exited")
+        return json.loads(line)
+
+    def _start(self):
+        self._proc = subprocess.Popen(
+            self._argv,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=_NARGO_OUTPUT,
+            text=True, bufsize=1,
+        )
+        self._lines = queue.SimpleQueue()
+        threading.Thread(
+            target=self._read_lines, args=(self._proc.stdout, self._lines),
+            name="web3-prover-reader", daemon=True,
+        ).start()
+        if not self._call({"op": "ping"}).get("ok"):
+            raise RuntimeError("prover worker handshake failed")
+
+    def _stop(self):
+        if self._proc is not None:
+            self._proc.kill()
+            self._proc = None
+
+    def prove(self, circuit: Circuit, inputs: dict) -> Optional[bytes]:
+        """
+        Return proof bytes, or None if the prover rejected the inputs.
+        Raises RuntimeError (and marks the worker broken) if it can't be used.
+        """
+        with self._lock:
+            if self.broken:
+                raise RuntimeError("prover worker unavailable")
+            try:
+                if self._proc is None or self._proc.poll() is not None:
+                    self._start()
+                reply = self._call({
+                    "op": "prove",
+                    "circuit": circuit.name,
+                    "dir": circuit.dir,
+                    # Field values as decimal strings, as in Prover.toml
+                    "inputs": {name: str(value) for name, value in inputs.items()},
+                })
+            except (OSError, ValueError, RuntimeError) as exc:
+                self.broken = True
+                self._stop()
+                raise RuntimeError(f"prover worker unavailable: {exc}") from exc
+        if not reply.get("ok"):
+            return None
+        return base64.b64decode(reply["proof"])
+
+
+@lru_cache(maxsize=1)
+def _prover_worker() -> Optional[_NargoWorker]:
+    """The process-wide worker, or None when WEB3_PROVER_CMD is unset."""
+    cmd = os.environ.get("WEB3_PROVER_CMD")
+    return _NargoWorker(cmd) if cmd else None
+
+
+_PROVER_TOML_TMPL = {
+    circuit: "".join(f'{name} = "{{{name}}}"\n' for name in fields).format_map
+    for circuit, fields in CIRCUIT_FIELDS.items()
+}
+
+
+def _prover_toml(circuit_name: str, inputs: dict) -> bytes:
+    template = _PROVER_TOML_TMPL.get(circuit_name)
+    if template is not None:
+        return template(inputs).encode()
+    return "".join(f'{name} = "{value}"\n' for name, value in inputs.items()).encode()
+
+
+class NargoBackend:
+    """
+    Proves through the persistent WEB3_PROVER_CMD worker when configured,
+    else a one-shot `nargo prove` via Prover.toml.
+    """
+
+    name = "nargo"
+
+    def available(self) -> bool:
+        worker = _prover_worker()
+        return (worker is not None and not worker.broken) or _nargo_available()
+
+    def prove(self, circuit: Circuit, inputs: dict) -> Optional[bytes]:
+        worker = _prover_worker()
+        if worker is not None and not worker.broken:
+            try:
+                return worker.prove(circuit, inputs)
+            except RuntimeError:
+                pass   # worker unusable; the CLI covers this and later proofs
+        return _run_nargo_cli(circuit, _prover_toml(circuit.name, inputs))
+
+
+# ── noir_py (in-process) ──────────────────────────────────────────────────────
+
+class NoirPyBackend:
+    """
+    In-process prover: no Prover.toml, no child process, no proof file to
+    read back. No such extension ships with this repo; it is any importable
+    module named `noir_py` (e.g. a PyO3 crate over acvm and a proving
+    backend) that provides:
+
+        prove(acir: bytes, witness: dict[str, str]) -> bytes
+
+    `acir` is the bytecode from the circuit's `nargo compile` output
+    (target/<name>.json); `witness` maps input names to decimal strings, as
+    in Prover.toml. It raises on failure.
+
+    Each circuit's ACIR is read once and kept in memory. Circuits that
+    haven't been compiled, and proofs the extension fails on, go through
+    nargo instead.
+    """
+
+    name = "noir_py"
+
+    def __init__(self):
+        module = importlib.import_module("noir_py")   # ImportError if missing
+        self._prove = getattr(module, "prove")          # AttributeError if not ours
+        self._fallback = NargoBackend()
+        self._acirs: dict = {}   # circuit dir -> ACIR bytes, or None if not compiled
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        return True
+
+    def _acir(self, circuit: Circuit) -> Optional[bytes]:
+        with self._lock:
+            if circuit.dir not in self._acirs:
+                program = os.path.join(circuit.dir, "target", f"{circuit.name}.json")
+                try:
+                    with open(program, "rb") as f:
+                        self._acirs[circuit.dir] = base64.b64decode(json.load(f)["bytecode"])
+                except (OSError, ValueError, KeyError):
+                    self._acirs[circuit.dir] = None
+            return self._acirs[circuit.dir]
+
+    def prove(self, circuit: Circuit, inputs: dict) -> Optional[bytes]:
+        acir = self._acir(circuit)
+        if acir is not None:
+            try:
+                return bytes(self._prove(acir, {name: str(value) for name, value in inputs.items()}))
+            except Exception as exc:
+                print(f"[web3] WARNING: noir_py failed on {circuit.name} ({exc}); using nargo")
+        return self._fallback.prove(circuit, inputs)
+
+
+# ── icicle (GPU) ──────────────────────────────────────────────────────────────
+
+# BN254 scalar field modulus; Noir Fields (and negative dx/dy) reduce mod this.
+_BN254_R = 21888242871839275222246405745257275088548364400416034343698204186575808495617
+
+# Proof buffer handed to the library first; it reports the size it needs
+# when that's too small (status 2) and the call is retried once.
+_ICICLE_PROOF_BUF = 64 * 1024
+
+
+class IcicleBackend:
+    """
+    GPU prover (CUDA/Metal via ICICLE) in a shared library loaded with ctypes.
+
+    icicle-snark itself proves circom Groth16 witnesses, so the Noir circuits
+    need a shim built against it for the compiled circuits in each circuit
+    directory. The library must export:
+
+        int32_t web3_prove(const char *circuit_name, const char *circuit_dir,
+                           const uint8_t *witness, size_t witness_len,
+                           uint8_t *proof_out, size_t *proof_len);
+
+    `witness` is one 32-byte big-endian field element per input, in
+    CIRCUIT_FIELDS order. `*proof_len` is the buffer size on entry and the
+    proof size on return. Returns 0 on success, 2 if the buffer is too small
+    (with `*proof_len` set to the size needed), anything else on failure.
+    """
+
+    name = "icicle"
+
+    def __init__(self, lib_path: str):
+        self._lib = ctypes.CDLL(lib_path)   # OSError if missing/unloadable
+        fn = self._lib.web3_prove
+        fn.argtypes = [
+            ctypes.c_char_p, ctypes.c_char_p,
+            ctypes.c_char_p, ctypes.c_size_t,
+            ctypes.c_char_p, ctypes.POINTER(ctypes.c_size_t),
+        ]
+        fn.restype = ctypes.c_int32
+        self._prove = fn
+        # One GPU context; don't assume the library is re-entrant.
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        return True
+
+    @staticmethod
+    def _pack(circuit: Circuit, inputs: dict) -> bytes:
+        return b"".join(
+            (int(inputs[field]) % _BN254_R).to_bytes(32, "big")
+            for field in CIRCUIT_FIELDS[circuit.name]
+        )
+
+    def prove(self, circuit: Circuit, inputs: dict) -> Optional[bytes]:
+        witness = self._pack(circuit, inputs)
+        name, circuit_dir = circuit.name.encode(), circuit.dir.encode()
+        size = _ICICLE_PROOF_BUF
+        with self._lock:
+            for _ in range(2):
+                buf = ctypes.create_string_buffer(size)
+                proof_len = ctypes.c_size_t(size)
+                status = self._prove(name, circuit_dir, witness, len(witness), buf, ctypes.byref(proof_len))
+                if status == 0:
+                    return buf.raw[:proof_len.value]
+                if status != 2:
+                    return None
+                size = proof_len.value
+        return None
+
+
+def default_backend() -> ProofBackend:
+    """
+    Backend picked by WEB3_PROOF_BACKEND (default "nargo"). "noir_py" and
+    "icicle" are only used when named there, and fall back to nargo if they
+    can't load; "icicle" loads WEB3_ICICLE_LIB.
+    """
+    choice = os.environ.get("WEB3_PROOF_BACKEND", "nargo").lower()
+    if choice == "noir_py":
+        try:
+            return NoirPyBackend()
+        except (ImportError, AttributeError) as exc:
+            print(f"[web3] WARNING: noir_py backend unavailable ({exc}); using nargo")
+    if choice == "icicle":
+        lib_path = os.environ.get("WEB3_ICICLE_LIB")
+        if lib_path:
+            try:
+                return IcicleBackend(lib_path)
+            except (OSError, AttributeError) as exc:
+                print(f"[web3] WARNING: icicle backend unavailable ({exc}); using nargo")
+        else:
+            print("[web3] WARNING: WEB3_PROOF_BACKEND=icicle needs WEB3_ICICLE_LIB; using nargo")
+    return NargoBackend()
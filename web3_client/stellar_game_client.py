@@ -18,10 +18,19 @@ Flow
 """
 
 import os
+import threading
+import time
+from binascii import unhexlify
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Optional
 
 from stellar_sdk import Network, SorobanServer, TransactionEnvelope, scval
 from stellar_sdk.contract import ContractClient
+from stellar_sdk.contract.exceptions import SimulationFailedError
+
+from web3_client.inflight import InflightCalls
 
 
 # ── configuration ────────────────────────────────────────────────────────────
@@ -52,6 +61,56 @@ class StellarConfig:
         return cls(rpc_url=rpc_url, network_passphrase=passphrase, contract_id=contract_id)
 
 
+# ── simulation templates ─────────────────────────────────────────────────────
+# Entrypoints whose simulated footprint and resources don't depend on the
+# argument values (only fixed-size instance storage is touched), so one
+# simulation can be reused as a template for later calls.
+_TEMPLATE_FUNCTIONS = frozenset({"submit_move"})
+# Seconds a template is trusted before re-simulating; also how quickly fee
+# and resource changes on the network are picked up. Must stay well below
+# the 300 s transaction timeout baked into the template.
+_TEMPLATE_TTL = 30.0
+
+
+# ── read-call constants ──────────────────────────────────────────────────────
+# Read-only calls are simulated from the all-zero account and take no args;
+# shared across calls (ContractClient does not mutate either).
+_NULL_SOURCE = "GAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAWHF"
+_EMPTY_PARAMS: list = []
+
+# Player colours (game.py bot_colours plus the remaining crewmate colours).
+_COLOURS = ("Black", "Blue", "Brown", "Cyan", "Green", "Lime",
+            "Orange", "Pink", "Purple", "Red", "White", "Yellow")
+
+
+# ── scval helpers ────────────────────────────────────────────────────────────
+# Players, colours and proof hashes repeat across calls; stellar-sdk never
+# mutates scval objects, so the encoded values can be shared.
+
+@lru_cache(maxsize=256)
+def _scv_symbol(s: str):
+    return scval.to_symbol(s)
+
+
+@lru_cache(maxsize=1024)
+def _scv_bytes_hex(h: str):
+    # Every bytes argument is a BytesN<32>; fail here rather than after a
+    # simulation round-trip.
+    if len(h) != 64:
+        raise ValueError(f"expected 64 hex chars (32 bytes), got {len(h)}")
+    return scval.to_bytes(unhexlify(h))
+
+
+@lru_cache(maxsize=256)
+def _scv_address(address: str):
+    return scval.to_address(address)
+
+
+for _colour in _COLOURS:
+    _scv_symbol(_colour)
+del _colour
+
+
 # ── client ───────────────────────────────────────────────────────────────────
 
 class StellarGameClient:
@@ -60,13 +119,32 @@ class StellarGameClient:
     against the Soroban RPC and returns unsigned XDRs for wallet signing.
     """
 
-    def __init__(self, config: StellarConfig):
+    def __init__(self, config: StellarConfig, state_cache_ttl: float = 0.5):
         self.config = config
         self._contract = ContractClient(
             contract_id=config.contract_id,
             rpc_url=config.rpc_url,
             network_passphrase=config.network_passphrase,
         )
+        # One RPC server (and its HTTP connection pool) for every submit;
+        # share the ContractClient's when the SDK exposes it.
+        self._server = getattr(self._contract, "server", None) or SorobanServer(config.rpc_url)
+        # Shared by build_many() so concurrent simulations reuse worker threads.
+        self._build_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="soroban-build")
+        # get_game_state() result reused for `state_cache_ttl` seconds;
+        # stored as (expiry on time.monotonic(), state).
+        self.state_cache_ttl = state_cache_ttl
+        self._game_state_cache = (0.0, None)
+        # Concurrent cache misses share one simulation.
+        self._inflight = InflightCalls()
+        # None until the first build_tasks_xdr() finds out whether the
+        # deployed contract has submit_task_proofs.
+        self._has_submit_task_proofs = None
+        # (function_name, source) -> (expiry, simulated XDR) for _TEMPLATE_FUNCTIONS
+        self._footprint_cache = {}
+        # source -> (expiry, last sequence handed out by a template rebuild)
+        self._issued_sequences = {}
+        self._sequence_lock = threading.Lock()
 
     # ── internal ─────────────────────────────────────────────────────────────
 
@@ -74,7 +152,13 @@ class StellarGameClient:
         """
         Simulate `function_name` with `params` from `source` account,
         assemble the footprint, and return the unsigned transaction XDR.
+        For _TEMPLATE_FUNCTIONS a recent simulation is reused instead.
         """
+        key = (function_name, source)
+        if function_name in _TEMPLATE_FUNCTIONS:
+            cached = self._footprint_cache.get(key)
+            if cached and time.monotonic() < cached[0]:
+                return self._rebuild_from_template(cached[1], params, source)
         assembled = self._contract.invoke(
             function_name=function_name,
             parameters=params,
@@ -82,16 +166,87 @@ class StellarGameClient:
             signer=None,    # no signing here — wallet bridge signs
             simulate=True,
         )
-        return assembled.to_xdr()
+        xdr = assembled.to_xdr()
+        if function_name in _TEMPLATE_FUNCTIONS:
+            # The simulation took the on-chain sequence + 1. Reserve it like a
+            # rebuild would, or the first rebuild after this gets it again; and
+            # move past any rebuild reservations still outstanding.
+            envelope = TransactionEnvelope.from_xdr(
+                xdr,
+                network_passphrase=self.config.network_passphrase,
+            )
+            tx = envelope.transaction
+            tx.sequence = self._next_sequence(source, on_chain=tx.sequence - 1)
+            xdr = envelope.to_xdr()
+            self._footprint_cache[key] = (time.monotonic() + _TEMPLATE_TTL, xdr)
+        return xdr
+
+    def _rebuild_from_template(self, template_xdr: str, params: list, source: str) -> str:
+        """
+        Swap new arguments and the source account's next sequence number into
+        a simulated transaction, keeping its footprint, resources and fee.
+        Costs one account lookup instead of a full simulation.
+        """
+        envelope = TransactionEnvelope.from_xdr(
+            template_xdr,
+            network_passphrase=self.config.network_passphrase,
+        )
+        tx = envelope.transaction
+        tx.sequence = self._next_sequence(source)
+        op = tx.operations[0]
+        op.host_function.invoke_contract.args = list(params)
+        # Source-account auth entries record the invocation arguments too.
+        for entry in op.auth:
+            fn = entry.root_invocation.function
+            if fn.contract_fn is not None:
+                fn.contract_fn.args = list(params)
+        return envelope.to_xdr()
+
+    def _next_sequence(self, source: str, on_chain: Optional[int] = None) -> int:
+        """
+        Sequence number for the next template transaction from `source`; pass
+        `on_chain` when it is already known (from a simulation) to skip the
+        account lookup.
+
+        Rebuilds that follow each other before the earlier transactions land
+        get seq+1, seq+2, ... instead of all reading the same on-chain value,
+        so they must be submitted in the order they were built. A reservation
+        lapses after _TEMPLATE_TTL, so a transaction that was never submitted
+        can't leave a permanent gap.
+        """
+        if on_chain is None:
+            on_chain = self._server.load_account(source).sequence
+        with self._sequence_lock:
+            expiry, issued = self._issued_sequences.get(source, (0.0, 0))
+            if time.monotonic() >= expiry or issued < on_chain:
+                issued = on_chain
+            issued += 1
+            self._issued_sequences[source] = (time.monotonic() + _TEMPLATE_TTL, issued)
+        return issued
+
+    def build_many(self, specs: list) -> list:
+        """
+        Simulate several invocations concurrently. `specs` is a list of
+        (function_name, params, source) tuples, as taken by _build_xdr;
+        the unsigned XDRs come back in the same order.
+
+        Each spec needs its own source account: simulations that run side by
+        side from one account all read the same sequence number, so only one
+        of their transactions could ever land. Build those one after another.
+        """
+        sources = [source for _, _, source in specs]
+        if len(set(sources)) != len(sources):
+            raise ValueError("build_many needs a distinct source account per spec")
+        return list(self._build_pool.map(lambda spec: self._build_xdr(*spec), specs))
 
     @staticmethod
     def _proof_struct(proof_hash_hex: str, nullifier_hex: str, public_inputs_hex: list) -> object:
         """Encode a ProofInput { proof_hash, nullifier, public_inputs } struct."""
         return scval.to_struct({
-            "proof_hash": scval.to_bytes(bytes.fromhex(proof_hash_hex)),
-            "nullifier":  scval.to_bytes(bytes.fromhex(nullifier_hex)),
+            "proof_hash": _scv_bytes_hex(proof_hash_hex),
+            "nullifier":  _scv_bytes_hex(nullifier_hex),
             "public_inputs": scval.to_vec(
-                [scval.to_bytes(bytes.fromhex(h)) for h in public_inputs_hex]
+                [_scv_bytes_hex(h) for h in public_inputs_hex]
             ),
         })
 
@@ -111,18 +266,18 @@ class StellarGameClient:
         player_hash_hex / role_hash_hex must be 64-char hex strings (32 bytes).
         """
         params = [
-            scval.to_address(player_address),
-            scval.to_symbol(color),
-            scval.to_symbol(name[:10]),          # contract Symbol max 10 chars
-            scval.to_bytes(bytes.fromhex(player_hash_hex)),
-            scval.to_bytes(bytes.fromhex(role_hash_hex)),
+            _scv_address(player_address),
+            _scv_symbol(color),
+            _scv_symbol(name[:10]),          # contract Symbol max 10 chars
+            _scv_bytes_hex(player_hash_hex),
+            _scv_bytes_hex(role_hash_hex),
         ]
         return self._build_xdr("join_game", params, player_address)
 
     def build_move_xdr(self, player_address: str, x: int, y: int) -> str:
         """Build a submit_move transaction XDR."""
         params = [
-            scval.to_address(player_address),
+            _scv_address(player_address),
             scval.to_uint32(x),
             scval.to_uint32(y),
         ]
@@ -140,11 +295,40 @@ class StellarGameClient:
         Proof values come from nargo prove on noir_circuits/task_proof.
         """
         params = [
-            scval.to_address(player_address),
+            _scv_address(player_address),
             self._proof_struct(proof_hash_hex, nullifier_hex, public_inputs_hex),
         ]
         return self._build_xdr("submit_task_proof", params, player_address)
 
+    def build_tasks_xdr(self, player_address: str, proofs: list):
+        """
+        Build one submit_task_proofs XDR for a batch of
+        (proof_hash_hex, nullifier_hex, public_inputs_hex) task proofs.
+
+        Returns None when the deployed contract has no submit_task_proofs (or
+        rejects the batch over an already-used nullifier); the caller then submits the proofs one build_task_xdr() at a time,
+        since XDRs simulated together would all carry the same sequence number.
+        """
+        if self._has_submit_task_proofs is False:
+            return None
+        params = [
+            _scv_address(player_address),
+            scval.to_vec([self._proof_struct(*proof) for proof in proofs]),
+        ]
+        try:
+            xdr = self._build_xdr("submit_task_proofs", params, player_address)
+        except SimulationFailedError as exc:
+            if "nullifier already used" in str(exc):
+                # Contract build that reverts the whole batch on a used
+                # nullifier: one at a time, only the stale proof fails.
+                return None
+            if self._has_submit_task_proofs or "non-existent" not in str(exc):
+                raise
+            self._has_submit_task_proofs = False   # older deployment
+            return None
+        self._has_submit_task_proofs = True
+        return xdr
+
     def build_vote_xdr(
         self,
         voter_address: str,
@@ -157,11 +341,11 @@ class StellarGameClient:
         Vote proof values come from nargo prove on noir_circuits/vote_proof.
         """
         vote_struct = scval.to_struct({
-            "target_hash": scval.to_bytes(bytes.fromhex(target_hash_hex)),
-            "proof_hash":  scval.to_bytes(bytes.fromhex(proof_hash_hex)),
-            "nullifier":   scval.to_bytes(bytes.fromhex(nullifier_hex)),
+            "target_hash": _scv_bytes_hex(target_hash_hex),
+            "proof_hash":  _scv_bytes_hex(proof_hash_hex),
+            "nullifier":   _scv_bytes_hex(nullifier_hex),
         })
-        params = [scval.to_address(voter_address), vote_struct]
+        params = [_scv_address(voter_address), vote_struct]
         return self._build_xdr("submit_vote", params, voter_address)
 
     def build_kill_xdr(
@@ -177,15 +361,15 @@ class StellarGameClient:
         Kill proof values come from nargo prove on noir_circuits/kill_proof.
         """
         params = [
-            scval.to_address(killer_address),
-            scval.to_address(victim_address),
+            _scv_address(killer_address),
+            _scv_address(victim_address),
             self._proof_struct(proof_hash_hex, nullifier_hex, public_inputs_hex),
         ]
         return self._build_xdr("submit_kill_proof", params, killer_address)
 
     def build_meeting_xdr(self, caller_address: str) -> str:
         """Build a start_meeting transaction XDR."""
-        params = [scval.to_address(caller_address)]
+        params = [_scv_address(caller_address)]
         return self._build_xdr("start_meeting", params, caller_address)
 
     # ── submission ───────────────────────────────────────────────────────────
@@ -195,30 +379,60 @@ class StellarGameClient:
         Broadcast a wallet-signed transaction XDR to the Stellar network.
         Returns {"hash": ..., "status": ...} on success.
         """
-        server = SorobanServer(self.config.rpc_url)
         tx = TransactionEnvelope.from_xdr(
             signed_xdr,
             network_passphrase=self.config.network_passphrase,
         )
-        response = server.send_transaction(tx)
+        response = self._server.send_transaction(tx)
+        self._game_state_cache = (0.0, None)   # state may change once included
         status = (
             response.status.value
             if hasattr(response.status, "value")
             else str(response.status)
         )
+        if status == "ERROR":
+            self._footprint_cache.clear()   # templates may be stale; re-simulate
+            with self._sequence_lock:
+                self._issued_sequences.clear()   # e.g. tx_bad_seq; re-read from chain
         return {"hash": response.hash, "status": status}
 
+    def wait_for_transaction(self, tx_hash: str, timeout: float = 30.0, poll_seconds: float = 1.0) -> str:
+        """
+        Poll until a submitted transaction is in a ledger. Returns "SUCCESS",
+        "FAILED", or "NOT_FOUND" if it still isn't in one after `timeout`.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            status = self._server.get_transaction(tx_hash).status
+            status = status.value if hasattr(status, "value") else str(status)
+            remaining = deadline - time.monotonic()
+            if status != "NOT_FOUND" or remaining <= 0:
+                if status != "NOT_FOUND":
+                    self._game_state_cache = (0.0, None)
+                return status
+            time.sleep(min(poll_seconds, remaining))
+
     def get_game_state(self) -> dict:
-        """Fetch current on-chain game state via get_game_state() read call."""
+        """
+        Fetch current on-chain game state via get_game_state() read call.
+        Results are cached for `state_cache_ttl` seconds and dropped on
+        submit_signed_xdr(); treat the returned dict as read-only.
+        """
+        expiry, cached = self._game_state_cache
+        if time.monotonic() < expiry:
+            return cached
+        return self._inflight.run("get_game_state", self._fetch_game_state)
+
+    def _fetch_game_state(self) -> dict:
         assembled = self._contract.invoke(
             function_name="get_game_state",
-            parameters=[],
-            source="GAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAWHF",
+            parameters=_EMPTY_PARAMS,
+            source=_NULL_SOURCE,
             signer=None,
             simulate=True,
         )
         raw = assembled.result
-        if raw is None:
-            return {}
-        return scval.to_native(raw)
+        state = {} if raw is None else scval.to_native(raw)
+        self._game_state_cache = (time.monotonic() + self.state_cache_ttl, state)
+        return state
 
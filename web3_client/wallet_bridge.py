@@ -1,48 +1,264 @@
+import copy
+import gzip
+import io
 import json
+import queue
+import random
+import threading
 import time
 import webbrowser
-from urllib import request, error
+import zlib
+from http import client as http_client
+from urllib import error, parse
+
+from web3_client.inflight import InflightCalls
+
+try:
+    import orjson
+except ImportError:   # optional C-accelerated codec; stdlib json otherwise
+    orjson = None
+
+
+def _json_dumps(payload) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload).encode("utf-8")
+
+
+def _json_loads(data: bytes):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Request bodies above this size are gzip-encoded before sending.
+_GZIP_MIN_BYTES = 2048
+# Read size when inflating a gzip-encoded response.
+_READ_CHUNK = 64 * 1024
+
+
+def _read_body(resp):
+    if resp.getheader("Content-Encoding") != "gzip":
+        return resp.read()
+    # Inflate chunk by chunk as it arrives rather than buffering the
+    # compressed body first; orjson/json both accept the bytearray.
+    inflater = zlib.decompressobj(wbits=31)
+    data = bytearray()
+    while True:
+        chunk = resp.read(_READ_CHUNK)
+        if not chunk:
+            break
+        data += inflater.decompress(chunk)
+    data += inflater.flush()
+    return data
+
+
+def _bridge_error(exc: error.HTTPError):
+    """
+    The bridge's own JSON error payload ({"ok": false, "error": ...}) from an
+    HTTPError, or None when the body isn't one, e.g. Express's 404 page for a
+    route this bridge version doesn't have.
+    """
+    try:
+        payload = _json_loads(exc.read())
+    except ValueError:
+        return None
+    return payload if isinstance(payload, dict) and "error" in payload else None
+
+
+def _contains_null(value) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, dict):
+        return any(_contains_null(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(_contains_null(v) for v in value)
+    return False
+
+
+def _merge_patch(old: dict, new: dict):
+    """
+    Build an RFC 7386 JSON merge patch turning `old` into `new`.
+    Returns None when the change can't be expressed (merge patches use null
+    to delete keys, so new null values need a full save).
+    """
+    patch = {}
+    for key in old.keys() - new.keys():
+        patch[key] = None
+    for key, value in new.items():
+        if key in old and old[key] == value:
+            continue
+        if isinstance(value, dict) and isinstance(old.get(key), dict):
+            sub = _merge_patch(old[key], value)
+            if sub is None:
+                return None
+            patch[key] = sub
+        elif _contains_null(value):
+            return None
+        else:
+            patch[key] = value
+    return patch
 
 
 class WalletBridgeClient:
-    def __init__(self, base_url="http://127.0.0.1:8789"):
+    # Open browser tabs from a daemon thread so connect/sign calls return as
+    # soon as the bridge answers; set False on an instance to open inline.
+    _async_browser = True
+
+    def __init__(self, base_url="http://127.0.0.1:8789", pool_maxsize=4):
         self.base_url = base_url.rstrip("/")
+        parts = parse.urlsplit(self.base_url)
+        self._host = parts.hostname
+        self._port = parts.port
+        self._prefix = parts.path
+        # Idle keep-alive connections. A connection is checked out for the
+        # duration of one call, so threads never share a socket.
+        self._idle = queue.LifoQueue(maxsize=pool_maxsize)
+        # Concurrent waits on the same request share one poll/long-poll loop.
+        self._waits = InflightCalls()
+        # player_id -> (rev, snapshot) last saved/loaded, base for deltas
+        self._last_snapshot = {}
+        # Write batching (see enable_write_batching); off until enabled.
+        self._batching = False
+        self._batch_cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._queue = {}          # player_id -> encoded {playerId, snapshot}
+        self._queued_bytes = 0
+        # (expiry, payload) of the last healthy /health answer; see preflight.
+        self._health_cache = (0.0, None)
 
-    def _get(self, path):
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return http_client.HTTPConnection(self._host, self._port)
+
+    def _release(self, conn):
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def _request(self, method, path, body=None, headers=None, timeout=5):
         url = f"{self.base_url}{path}"
-        req = request.Request(url, method="GET")
-        with request.urlopen(req, timeout=5) as resp:
-            return json.loads(resp.read().decode("utf-8"))
+        for attempt in range(2):
+            conn = self._acquire()
+            reused = conn.sock is not None
+            conn.timeout = timeout
+            if reused:
+                conn.sock.settimeout(timeout)
+            try:
+                conn.request(method, f"{self._prefix}{path}", body=body, headers=headers or {})
+                resp = conn.getresponse()
+                data = _read_body(resp)
+            except (http_client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as exc:
+                conn.close()
+                # The bridge drops idle keep-alive sockets; retry once on a fresh one.
+                if reused and attempt == 0:
+                    continue
+                raise error.URLError(exc) from exc
+            except (http_client.HTTPException, OSError) as exc:
+                conn.close()
+                raise error.URLError(exc) from exc
+
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            if resp.status >= 400:
+                raise error.HTTPError(url, resp.status, resp.reason, resp.headers, io.BytesIO(data))
+            return _json_loads(data)
+
+    def _get(self, path):
+        return self._request("GET", path, timeout=5)
 
     def _post(self, path, payload):
-        url = f"{self.base_url}{path}"
-        body = json.dumps(payload).encode("utf-8")
-        req = request.Request(
-            url,
-            data=body,
-            headers={"Content-Type": "application/json"},
-            method="POST",
-        )
-        with request.urlopen(req, timeout=10) as resp:
-            return json.loads(resp.read().decode("utf-8"))
+        return self._post_raw(path, _json_dumps(payload))
+
+    def _post_raw(self, path, body):
+        headers = {"Content-Type": "application/json"}
+        if len(body) > _GZIP_MIN_BYTES:
+            body = gzip.compress(body, compresslevel=1)
+            headers["Content-Encoding"] = "gzip"
+        return self._request("POST", path, body=body, headers=headers, timeout=10)
+
+    def _open_browser(self, url):
+        if self._async_browser:
+            threading.Thread(target=webbrowser.open, args=(url,), daemon=True).start()
+        else:
+            webbrowser.open(url)
+
+    def close(self):
+        """Close all idle pooled connections."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
 
     def health(self):
         return self._get("/health")
 
+    def preflight(self, ttl=5.0):
+        """
+        Like health(), but a healthy answer is reused for `ttl` seconds so
+        callers can check before every action without a round-trip each time.
+        Unhealthy answers and errors are never cached.
+        """
+        expiry, cached = self._health_cache
+        if time.monotonic() < expiry:
+            return cached
+        payload = self.health()
+        if payload.get("ok", False):
+            self._health_cache = (time.monotonic() + ttl, payload)
+        return payload
+
     def get_account(self):
         return self._get("/wallet/account")
 
     def get_account_for_player(self, player_id):
         return self._get(f"/wallet/account?playerId={player_id}")
 
+    def await_account_connection(self, player_id, timeout=60, poll_seconds=2.0):
+        """
+        Block until player_id's wallet is connected or `timeout` seconds pass,
+        then return the account (same shape as get_account_for_player).
+        Uses the bridge's /wallet/account/wait long-poll; bridges without it
+        are polled every `poll_seconds`.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            window = max(0.0, min(deadline - time.monotonic(), 60.0))
+            try:
+                account = self._request(
+                    "GET",
+                    f"/wallet/account/wait?playerId={player_id}&timeout={window:.1f}",
+                    timeout=window + 5,
+                )
+            except error.HTTPError as exc:
+                if exc.code != 404:
+                    raise
+                return self._poll_account_connection(player_id, deadline, poll_seconds)
+            if account.get("connected") or time.monotonic() >= deadline:
+                return account
+
+    def _poll_account_connection(self, player_id, deadline, poll_seconds):
+        while True:
+            account = self.get_account_for_player(player_id)
+            remaining = deadline - time.monotonic()
+            if account.get("connected") or remaining <= 0:
+                return account
+            time.sleep(min(poll_seconds, remaining))
+
     def connect(self):
         return self._post("/wallet/connect", {})
 
     def connect_player(self, player_id, display_name=None, open_browser=True):
         payload = {"playerId": player_id, "displayName": display_name}
         response = self._post("/wallet/connect", payload)
-        if open_browser and response.get("connectUrl"):
-            webbrowser.open(response["connectUrl"])
+        already_connected = response.get("account", {}).get("connected")
+        if open_browser and response.get("connectUrl") and not already_connected:
+            self._open_browser(response["connectUrl"])
         return response
 
     def sign_xdr(self, xdr, network_passphrase):
@@ -66,35 +282,232 @@ class WalletBridgeClient:
             },
         )
         if open_browser and response.get("signerUrl"):
-            webbrowser.open(response["signerUrl"])
+            self._open_browser(response["signerUrl"])
         return response
 
     def get_sign_request(self, request_id):
         return self._get(f"/tx/request/{request_id}")
 
-    def wait_for_signed_request(self, request_id, timeout_seconds=120, poll_seconds=1.5):
-        started = time.time()
-        while time.time() - started <= timeout_seconds:
-            payload = self.get_sign_request(request_id)
+    def complete_sign_request(self, request_id, signed_xdr, wallet_address=None):
+        """Mark a request signed, as the browser signer page does (tests, headless signers)."""
+        return self._post(
+            f"/tx/request/{request_id}/complete",
+            {
+                "signedXdr": signed_xdr,
+                "walletAddress": wallet_address,
+            },
+        )
+
+    def wait_for_signed_request(self, request_id, timeout_seconds=120, poll_seconds=1.5, max_poll_seconds=5.0):
+        """
+        Poll until the request is signed/rejected, backing off from
+        `poll_seconds` up to `max_poll_seconds` while the signer is idle.
+        Callers already waiting on `request_id` with the same arguments share
+        the same loop (so nobody inherits another caller's shorter timeout).
+        """
+        return self._waits.run(
+            ("poll", request_id, timeout_seconds, poll_seconds, max_poll_seconds),
+            self._poll_signed_request,
+            request_id, timeout_seconds, poll_seconds, max_poll_seconds,
+        )
+
+    def _poll_signed_request(self, request_id, timeout_seconds, poll_seconds, max_poll_seconds):
+        deadline = time.monotonic() + timeout_seconds
+        delay = poll_seconds
+        while True:
+            growth = 1.5
+            try:
+                payload = self.get_sign_request(request_id)
+            except error.HTTPError:
+                raise
+            except error.URLError:
+                # Bridge briefly unreachable (e.g. restarting) — back off harder.
+                payload = None
+                growth = 2.0
+            if payload is not None:
+                if not payload.get("ok"):
+                    return payload
+                status = payload["request"].get("status")
+                if status in {"signed", "rejected"}:
+                    return payload
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return {"ok": False, "error": "sign_request_timeout", "requestId": request_id}
+            # Never sleep past the deadline; the last poll lands right on it.
+            time.sleep(min(delay * random.uniform(0.9, 1.1), remaining))
+            delay = min(delay * growth, max_poll_seconds)
+
+    def wait_for_signed_request_longpoll(self, request_id, timeout_seconds=120, wait_seconds=30):
+        """
+        Like wait_for_signed_request, but blocks on the bridge's
+        /tx/request/{id}/wait long-poll so the result arrives as soon as the
+        signer completes. Falls back to polling on bridges without /wait.
+        Coalesced like wait_for_signed_request.
+        """
+        return self._waits.run(
+            ("longpoll", request_id, timeout_seconds, wait_seconds),
+            self._longpoll_signed_request,
+            request_id, timeout_seconds, wait_seconds,
+        )
+
+    def _longpoll_signed_request(self, request_id, timeout_seconds, wait_seconds):
+        deadline = time.monotonic() + timeout_seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return {"ok": False, "error": "sign_request_timeout", "requestId": request_id}
+            window = min(wait_seconds, remaining)
+            try:
+                payload = self._request(
+                    "GET",
+                    f"/tx/request/{request_id}/wait?timeout={window:.1f}",
+                    timeout=window + 5,
+                )
+            except error.HTTPError as exc:
+                if exc.code != 404:
+                    raise
+                payload = _bridge_error(exc)
+                if payload is not None:
+                    return payload   # e.g. request_not_found: nothing to wait for
+                # Bridge without /wait
+                return self.wait_for_signed_request(request_id, timeout_seconds=remaining)
             if not payload.get("ok"):
                 return payload
-            status = payload["request"].get("status")
-            if status in {"signed", "rejected"}:
+            if payload["request"].get("status") in {"signed", "rejected"}:
                 return payload
-            time.sleep(poll_seconds)
-        return {"ok": False, "error": "sign_request_timeout", "requestId": request_id}
 
     def save_snapshot(self, player_id, snapshot):
-        return self._post(
+        if self._batching:
+            self._enqueue_snapshot(player_id, snapshot)
+            return {"ok": True, "queued": True}
+        response = self._post(
             "/game/snapshot",
             {
                 "playerId": player_id,
                 "snapshot": snapshot,
             },
         )
+        self._remember_snapshot(player_id, response.get("rev"), snapshot)
+        return response
+
+    def save_snapshot_delta(self, player_id, snapshot):
+        """
+        Save `snapshot` by sending only a JSON merge patch against the last
+        revision this client saved or loaded for `player_id`. Falls back to a
+        full save when there is no base revision, the patch can't express the
+        change, or the bridge holds a different revision.
+        """
+        # Held across the whole delta so it can't be built on a base that an
+        # in-flight flush_sync() batch is about to replace.
+        with self._flush_lock:
+            if self._batching and player_id in self._queue:
+                # A full write for this player is still queued; keep ordering.
+                return self.save_snapshot(player_id, snapshot)
+            base = self._last_snapshot.get(player_id)
+            patch = _merge_patch(base[1], snapshot) if base and isinstance(snapshot, dict) else None
+            if patch is None:
+                return self.save_snapshot(player_id, snapshot)
+            if not patch:
+                return {"ok": True, "rev": base[0], "unchanged": True}
+            try:
+                response = self._post(
+                    "/game/snapshot/delta",
+                    {
+                        "playerId": player_id,
+                        "baseRev": base[0],
+                        "patch": patch,
+                    },
+                )
+            except error.HTTPError as exc:
+                # 409: bridge is on another revision; 404: bridge predates deltas.
+                if exc.code not in (404, 409):
+                    raise
+                return self.save_snapshot(player_id, snapshot)
+            self._remember_snapshot(player_id, response.get("rev"), snapshot)
+            return response
+
+    def _remember_snapshot(self, player_id, rev, snapshot):
+        if rev is not None and isinstance(snapshot, dict):
+            self._last_snapshot[player_id] = (rev, copy.deepcopy(snapshot))
+
+    def enable_write_batching(self, flush_ms=50, max_bytes=64_000):
+        """
+        Buffer save_snapshot() calls for up to `flush_ms` and send them as one
+        POST /game/snapshot/batch from a background thread. A newer write for
+        a player replaces its queued one; the batch is sent early once it
+        reaches `max_bytes`. Call flush_sync() before exiting.
+        """
+        self._flush_seconds = flush_ms / 1000
+        self._max_bytes = max_bytes
+        if not self._batching:
+            self._batching = True
+            threading.Thread(target=self._batch_loop, daemon=True).start()
+
+    def _enqueue_snapshot(self, player_id, snapshot):
+        entry = _json_dumps({"playerId": player_id, "snapshot": snapshot})
+        with self._batch_cond:
+            old = self._queue.pop(player_id, None)
+            if old is not None:
+                self._queued_bytes -= len(old)
+            self._queue[player_id] = entry
+            self._queued_bytes += len(entry)
+            self._batch_cond.notify()
+
+    def _batch_loop(self):
+        while True:
+            with self._batch_cond:
+                while not self._queue:
+                    self._batch_cond.wait()
+                deadline = time.monotonic() + self._flush_seconds
+                while self._queued_bytes < self._max_bytes:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._batch_cond.wait(remaining)
+            try:
+                self.flush_sync()
+            except Exception:
+                time.sleep(1.0)   # bridge unreachable; writes stay queued
+
+    def flush_sync(self):
+        """Send every queued snapshot write now, on the calling thread."""
+        with self._flush_lock:
+            with self._batch_cond:
+                pending, self._queue = self._queue, {}
+                self._queued_bytes = 0
+            if not pending:
+                return {"ok": True, "revs": {}}
+            body = b'{"snapshots":[' + b",".join(pending.values()) + b"]}"
+            try:
+                response = self._post_raw("/game/snapshot/batch", body)
+            except Exception:
+                with self._batch_cond:
+                    for player_id, entry in pending.items():
+                        if player_id not in self._queue:
+                            self._queue[player_id] = entry
+                            self._queued_bytes += len(entry)
+                raise
+            with self._batch_cond:
+                superseded = set(self._queue)   # newer writes queued meanwhile
+            for player_id, rev in response.get("revs", {}).items():
+                entry = pending.get(player_id)
+                if entry is None or player_id in superseded:
+                    continue
+                snapshot = _json_loads(entry)["snapshot"]
+                if isinstance(snapshot, dict):
+                    self._last_snapshot[player_id] = (rev, snapshot)
+            return response
 
     def load_snapshot(self, player_id):
-        return self._get(f"/game/snapshot/{player_id}")
+        if self._batching and player_id in self._queue:
+            self.flush_sync()   # read-your-writes
+        # Large snapshots come back gzipped and chunked; see _read_body.
+        response = self._request(
+            "GET", f"/game/snapshot/{player_id}", headers={"Accept-Encoding": "gzip"}, timeout=5
+        )
+        if response.get("found"):
+            self._remember_snapshot(player_id, response.get("rev"), response.get("snapshot"))
+        return response
 
     def sign_and_submit(self, xdr, network_passphrase, rpc_url):
         return self._post(
@@ -106,11 +519,21 @@ class WalletBridgeClient:
             },
         )
 
+    def batch(self, requests):
+        """
+        Send several bridge calls in one round-trip via POST /bridge/batch.
+        `requests` is a list of {"method", "path", "body"?} dicts; the JSON
+        bodies come back in the same order.
+        """
+        response = self._post("/bridge/batch", {"requests": requests})
+        return [item["body"] for item in response["responses"]]
+
     def safe_connect(self):
+        # One round-trip: a bridge that answers with an error is up but
+        # unhealthy; one that can't be reached raises a plain URLError.
         try:
-            health = self.health()
-            if not health.get("ok", False):
-                return {"ok": False, "reason": "bridge_not_healthy"}
             return self.connect()
-        except error.URLError:
-            return {"ok": False, "reason": "bridge_unreachable"}
+        except error.HTTPError as e:
+            return {"ok": False, "reason": "bridge_not_healthy", "detail": str(e)}
+        except error.URLError as e:
+            return {"ok": False, "reason": "bridge_unreachable", "detail": str(e)}
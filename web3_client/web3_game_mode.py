@@ -4,7 +4,8 @@ web3_game_mode.py
 Orchestrates the Web3 gameplay mode:
   - connects to the local wallet bridge
   - builds Soroban XDR for every game-impacting action
-  - submits XDRs to the bridge for Freighter signing (non-blocking thread)
+  - submits XDRs to the bridge for Freighter signing (one asyncio loop
+    thread with aiohttp installed, else a background worker pool)
   - after signature, broadcasts the transaction to the Stellar RPC
   - exposes status_message so the Pygame UI can show toast notifications
 
@@ -14,139 +15,160 @@ ZK proofs (kill, task, vote) must come from `nargo prove` on the circuits in
 noir_circuits/. Until nargo is installed, calls that need a proof will set
 `proof_pending=True` and queue the job. When the nargo CLI is available,
 `generate_proof(circuit, inputs)` is called and returns the real proof bytes.
+
+Proving goes through a ProofBackend (web3_client/proof_backend.py): nargo by
+default, optionally a persistent WEB3_PROVER_CMD worker or a GPU library.
 """
 
+import asyncio
 import hashlib
 import os
-import subprocess
 import threading
 import time
-from typing import Optional, Callable
+from concurrent.futures import Future
+from typing import Callable, Optional
 
+from web3_client.daemon_pool import DaemonPool
+from web3_client.proof_backend import CIRCUIT_FIELDS, Circuit, ProofBackend, circuit_paths, default_backend
 from web3_client.wallet_bridge import WalletBridgeClient
 from web3_client.stellar_game_client import StellarGameClient, StellarConfig
 
+try:
+    from web3_client.async_wallet_bridge import AsyncWalletBridgeClient
+except ImportError:   # aiohttp not installed; sign waits run on the I/O pool
+    AsyncWalletBridgeClient = None
 
-# ── nargo helpers ─────────────────────────────────────────────────────────────
-
-def _nargo_available() -> bool:
-    """Return True if nargo CLI is found on PATH."""
-    try:
-        result = subprocess.run(
-            ["nargo", "--version"],
-            capture_output=True, timeout=5,
-        )
-        return result.returncode == 0
-    except (FileNotFoundError, subprocess.TimeoutExpired):
-        return False
 
+# ── per-action proof generation ───────────────────────────────────────────────
 
-def _run_nargo_prove(circuit_dir: str, prover_toml_content: str) -> Optional[bytes]:
+def _proof_hash(proof_bytes: bytes) -> str:
     """
-    Write Prover.toml, run `nargo prove`, read back the proof bytes.
-    Returns raw proof bytes, or None on failure.
+    On-chain id of a proof artifact: hex SHA-256 of the proof bytes.
+    The verifier contract looks proofs up by this value, so it must not
+    change independently of the verifier (see docs/web3/CIRCUIT_IO_SCHEMA.md).
     """
-    prover_toml = os.path.join(circuit_dir, "Prover.toml")
-    try:
-        with open(prover_toml, "w") as f:
-            f.write(prover_toml_content)
-        result = subprocess.run(
-            ["nargo", "prove"],
-            cwd=circuit_dir,
-            capture_output=True, timeout=60,
-        )
-        if result.returncode != 0:
-            return None
-        # Proof file is written to proofs/<circuit_name>.proof
-        proof_files = []
-        for fname in os.listdir(os.path.join(circuit_dir, "proofs")):
-            if fname.endswith(".proof"):
-                proof_files.append(os.path.join(circuit_dir, "proofs", fname))
-        if not proof_files:
-            return None
-        with open(proof_files[0], "rb") as f:
-            return f.read()
-    except Exception:
-        return None
+    return hashlib.sha256(proof_bytes).hexdigest()
 
 
-# ── per-action proof generation ───────────────────────────────────────────────
+# Commitment / nullifier formulas shared with the circuits' constraints.
+# Each returns (commitment, nullifier) as exact ints: they are witness values
+# and must not wrap, so only the on-chain nullifier id is masked (below).
+
+def _role_commitment(player_secret: int, role_secret: int, round_id: int):
+    return role_secret * role_secret + player_secret * 19 + 17, player_secret * 31 + round_id * 97 + 7
+
+
+def _task_commitment(task_id: int, task_secret: int, player_secret: int, round_id: int):
+    return (task_id * 131 + task_secret * 17 + player_secret * 23,
+            player_secret * 41 + task_id * 13 + round_id * 101)
+
+
+def _kill_commitment(dx: int, dy: int, player_secret: int, round_id: int):
+    # 98 = cooldown_ok + role_flag * 97, both fixed at 1 in the submitted witness
+    return (dx * dx + dy * dy) * 11 + 98 + player_secret * 5, player_secret * 67 + round_id * 17
+
+
+def _vote_commitment(target_index: int, player_secret: int, meeting_round: int):
+    return (target_index * 257 + player_secret * 29 + meeting_round * 3,
+            player_secret * 53 + meeting_round * 11)
+
+
+def _nullifier_hex(nullifier: int) -> str:
+    return f"{nullifier & 0xFFFFFFFFFFFFFFFF:064x}"
 
-def _make_role_proof(circuits_root: str, player_secret: int, role_secret: int, round_id: int):
-    """Generate a role ZK proof via nargo. Returns (proof_hash_hex, nullifier_hex)."""
-    role_commitment = role_secret * role_secret + player_secret * 19 + 17
-    nullifier = player_secret * 31 + round_id * 97 + 7
-    toml = (
-        f'role_secret = "{role_secret}"\n'
-        f'player_secret = "{player_secret}"\n'
-        f'round_id = "{round_id}"\n'
-        f'role_commitment = "{role_commitment}"\n'
-        f'action_nullifier = "{nullifier}"\n'
-    )
-    proof_bytes = _run_nargo_prove(os.path.join(circuits_root, "role_proof"), toml)
+
+def _make_role_proof(backend: ProofBackend, circuit: Circuit, player_secret: int, role_secret: int, round_id: int):
+    """Generate a role ZK proof with `backend`. Returns (proof_hash_hex, nullifier_hex)."""
+    role_commitment, nullifier = _role_commitment(player_secret, role_secret, round_id)
+    inputs = {
+        "role_secret": role_secret,
+        "player_secret": player_secret,
+        "round_id": round_id,
+        "role_commitment": role_commitment,
+        "action_nullifier": nullifier,
+    }
+    proof_bytes = backend.prove(circuit, inputs)
     if proof_bytes is None:
-        raise RuntimeError("nargo prove failed for role_proof")
-    proof_hash = hashlib.sha256(proof_bytes).hexdigest()
-    return proof_hash, format(nullifier & 0xFFFFFFFFFFFFFFFF, "064x")
-
-
-def _make_task_proof(circuits_root: str, task_id: int, task_secret: int, player_secret: int, round_id: int):
-    """Generate a task ZK proof via nargo. Returns (proof_hash_hex, nullifier_hex)."""
-    task_commitment = task_id * 131 + task_secret * 17 + player_secret * 23
-    nullifier = player_secret * 41 + task_id * 13 + round_id * 101
-    toml = (
-        f'task_id = "{task_id}"\n'
-        f'task_secret = "{task_secret}"\n'
-        f'player_secret = "{player_secret}"\n'
-        f'round_id = "{round_id}"\n'
-        f'task_commitment = "{task_commitment}"\n'
-        f'action_nullifier = "{nullifier}"\n'
-    )
-    proof_bytes = _run_nargo_prove(os.path.join(circuits_root, "task_proof"), toml)
+        raise RuntimeError(f"{backend.name} prove failed for role_proof")
+    proof_hash = _proof_hash(proof_bytes)
+    return proof_hash, _nullifier_hex(nullifier)
+
+
+def _make_task_proof(backend: ProofBackend, circuit: Circuit, task_id: int, task_secret: int, player_secret: int, round_id: int):
+    """Generate a task ZK proof with `backend`. Returns (proof_hash_hex, nullifier_hex)."""
+    task_commitment, nullifier = _task_commitment(task_id, task_secret, player_secret, round_id)
+    inputs = {
+        "task_id": task_id,
+        "task_secret": task_secret,
+        "player_secret": player_secret,
+        "round_id": round_id,
+        "task_commitment": task_commitment,
+        "action_nullifier": nullifier,
+    }
+    proof_bytes = backend.prove(circuit, inputs)
     if proof_bytes is None:
-        raise RuntimeError("nargo prove failed for task_proof")
-    proof_hash = hashlib.sha256(proof_bytes).hexdigest()
-    return proof_hash, format(nullifier & 0xFFFFFFFFFFFFFFFF, "064x")
-
-
-def _make_kill_proof(circuits_root: str, dx: int, dy: int, player_secret: int, round_id: int):
-    """Generate a kill ZK proof via nargo. Returns (proof_hash_hex, nullifier_hex)."""
-    distance = dx * dx + dy * dy
-    kill_commitment = distance * 11 + 1 + 97 + player_secret * 5
-    nullifier = player_secret * 67 + round_id * 17
-    toml = (
-        f'dx = "{dx}"\n'
-        f'dy = "{dy}"\n'
-        f'cooldown_ok = "1"\n'
-        f'role_flag = "1"\n'
-        f'player_secret = "{player_secret}"\n'
-        f'round_id = "{round_id}"\n'
-        f'kill_commitment = "{kill_commitment}"\n'
-        f'action_nullifier = "{nullifier}"\n'
-    )
-    proof_bytes = _run_nargo_prove(os.path.join(circuits_root, "kill_proof"), toml)
+        raise RuntimeError(f"{backend.name} prove failed for task_proof")
+    proof_hash = _proof_hash(proof_bytes)
+    return proof_hash, _nullifier_hex(nullifier)
+
+
+def _make_kill_proof(backend: ProofBackend, circuit: Circuit, dx: int, dy: int, player_secret: int, round_id: int):
+    """Generate a kill ZK proof with `backend`. Returns (proof_hash_hex, nullifier_hex)."""
+    kill_commitment, nullifier = _kill_commitment(dx, dy, player_secret, round_id)
+    inputs = {
+        "dx": dx,
+        "dy": dy,
+        "cooldown_ok": 1,
+        "role_flag": 1,
+        "player_secret": player_secret,
+        "round_id": round_id,
+        "kill_commitment": kill_commitment,
+        "action_nullifier": nullifier,
+    }
+    proof_bytes = backend.prove(circuit, inputs)
     if proof_bytes is None:
-        raise RuntimeError("nargo prove failed for kill_proof")
-    proof_hash = hashlib.sha256(proof_bytes).hexdigest()
-    return proof_hash, format(nullifier & 0xFFFFFFFFFFFFFFFF, "064x")
-
-
-def _make_vote_proof(circuits_root: str, target_index: int, player_secret: int, meeting_round: int):
-    """Generate a vote ZK proof via nargo. Returns (proof_hash_hex, nullifier_hex)."""
-    vote_commitment = target_index * 257 + player_secret * 29 + meeting_round * 3
-    nullifier = player_secret * 53 + meeting_round * 11
-    toml = (
-        f'target_index = "{target_index}"\n'
-        f'player_secret = "{player_secret}"\n'
-        f'meeting_round = "{meeting_round}"\n'
-        f'vote_commitment = "{vote_commitment}"\n'
-        f'action_nullifier = "{nullifier}"\n'
-    )
-    proof_bytes = _run_nargo_prove(os.path.join(circuits_root, "vote_proof"), toml)
+        raise RuntimeError(f"{backend.name} prove failed for kill_proof")
+    proof_hash = _proof_hash(proof_bytes)
+    return proof_hash, _nullifier_hex(nullifier)
+
+
+def _make_vote_proof(backend: ProofBackend, circuit: Circuit, target_index: int, player_secret: int, meeting_round: int):
+    """Generate a vote ZK proof with `backend`. Returns (proof_hash_hex, nullifier_hex)."""
+    vote_commitment, nullifier = _vote_commitment(target_index, player_secret, meeting_round)
+    inputs = {
+        "target_index": target_index,
+        "player_secret": player_secret,
+        "meeting_round": meeting_round,
+        "vote_commitment": vote_commitment,
+        "action_nullifier": nullifier,
+    }
+    proof_bytes = backend.prove(circuit, inputs)
     if proof_bytes is None:
-        raise RuntimeError("nargo prove failed for vote_proof")
-    proof_hash = hashlib.sha256(proof_bytes).hexdigest()
-    return proof_hash, format(nullifier & 0xFFFFFFFFFFFFFFFF, "064x")
+        raise RuntimeError(f"{backend.name} prove failed for vote_proof")
+    proof_hash = _proof_hash(proof_bytes)
+    return proof_hash, _nullifier_hex(nullifier)
+
+
+# Seconds task completions are buffered so a burst shares one transaction.
+_TASK_BATCH_WINDOW = 0.5
+
+# Concurrent bridge/RPC jobs (see Web3GameMode._io_pool).
+_IO_WORKERS = 8
+
+# How long connect() waits in the background for the wallet (5 minutes).
+_WALLET_WAIT_SECONDS = 300
+
+
+def _chain_future(source: Future, target: Future):
+    """Settle `target` the way `source` settles."""
+    def _copy(fut):
+        if fut.cancelled():
+            target.cancel()
+        elif fut.exception() is not None:
+            target.set_exception(fut.exception())
+        else:
+            target.set_result(fut.result())
+    source.add_done_callback(_copy)
 
 
 # ── Web3 game mode ─────────────────────────────────────────────────────────────
@@ -175,32 +197,71 @@ class Web3GameMode:
         player_id: str,
         network_passphrase: str,
         circuits_root: str,
+        proof_backend: Optional[ProofBackend] = None,   # default_backend() if None
+        async_bridge=None,   # AsyncWalletBridgeClient or None
     ):
         self.bridge = bridge
+        self.async_bridge = async_bridge
         self.stellar = stellar
-        self.wallet_address = wallet_address   # may be None until wallet connects
         self.player_id = player_id
         self.network_passphrase = network_passphrase
         self.circuits_root = circuits_root
+        # Paths never change for a session; resolved once here.
+        self._circuit_paths = {name: circuit_paths(circuits_root, name) for name in CIRCUIT_FIELDS}
+        self._proof_backend = proof_backend or default_backend()
         self.round_id = 1
         self.meeting_round = 0
 
-        # Derived once wallet address is known
-        self.player_secret: Optional[int] = (
-            int(hashlib.sha256(wallet_address.encode()).hexdigest()[:8], 16)
-            if wallet_address else None
-        )
+        # Set (with the derived player_secret) once the wallet connects
+        self.wallet_address: Optional[str] = None
+        self.player_secret: Optional[int] = None
+        self._addr_bytes: Optional[bytes] = None
+        if wallet_address:
+            self._set_wallet(wallet_address)
 
         # UI feedback — read by game.py draw() to show toast
         self.status_message: Optional[str] = None
         self.status_ok: bool = True      # True = green, False = red
-        self._status_until: float = 0.0  # epoch time when to clear
+        self._status_until: float = 0.0  # time.monotonic() when to clear
         self._permanent_msg: Optional[str] = None   # always-visible HUD line
         self._permanent_ok: bool = True
 
-        self._nargo_available = _nargo_available()
-        # Pending actions queued while wallet isn't connected yet
+        # Pending actions queued while wallet isn't connected yet; swapped
+        # out whole under _pending_lock when the wallet connects
         self._pending_queue: list = []
+        self._pending_lock = threading.Lock()
+        # Proofs are CPU-bound child processes (nargo / prover worker); the
+        # threads here only wait on them, so this bounds concurrent provers.
+        self._proof_pool = DaemonPool(
+            max_workers=max(1, (os.cpu_count() or 2) // 2),
+            thread_name_prefix="web3-proof",
+        )
+        # Bridge/RPC work (XDR builds, sign-request waits); bounded so a burst
+        # of actions can't outrun the bridge client's keep-alive pool.
+        self._io_pool = DaemonPool(max_workers=_IO_WORKERS, thread_name_prefix="web3-io")
+        # Nullifier hex -> Future of its proof while it is being proved and
+        # submitted; a repeat of the same action (double click, retry after a
+        # reconnect) is dropped instead of spending the nullifier twice.
+        self._inflight: dict = {}
+        self._inflight_lock = threading.Lock()
+        # (task_id, round_id, claim) completions waiting for the next batch flush
+        self._task_buffer: list = []
+        self._task_lock = threading.Lock()
+        self._task_flush_timer: Optional[threading.Timer] = None
+        # With async_bridge, sign-request waits and the wallet long-poll are
+        # coroutines on this one loop thread rather than a blocked worker each.
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closed = False   # set by close(); later hooks and replays are no-ops
+        if async_bridge is not None:
+            self._loop = asyncio.new_event_loop()
+            threading.Thread(target=self._loop.run_forever, name="web3-async", daemon=True).start()
+
+    @property
+    def _nargo_available(self) -> bool:
+        # Asked per proof: a prover worker that breaks mid-session turns this
+        # False (without nargo on PATH) so proofs fall back to placeholders.
+        # The nargo PATH probe itself runs once, on first use.
+        return self._proof_backend.available()
 
     # ── factory ───────────────────────────────────────────────────────────────
 
@@ -213,11 +274,12 @@ class Web3GameMode:
     ) -> "Web3GameMode":
         """
         Non-blocking factory. Returns immediately so the game loop can start.
-        Wallet connection is polled in a background thread.
+        Wallet connection is awaited (long-poll) in the background.
         Raises RuntimeError only if the bridge process itself is unreachable.
         """
-        import os
-        bridge = WalletBridgeClient(bridge_url)
+        # One keep-alive connection per I/O worker plus the wallet poll
+        # thread, so bursts reuse sockets instead of closing the extras.
+        bridge = WalletBridgeClient(bridge_url, pool_maxsize=_IO_WORKERS + 1)
 
         # Only hard-fail if the bridge process is down
         try:
@@ -253,6 +315,7 @@ class Web3GameMode:
             player_id=player_id,
             network_passphrase=network_passphrase,
             circuits_root=circuits_root,
+            async_bridge=AsyncWalletBridgeClient(bridge_url) if AsyncWalletBridgeClient else None,
         )
 
         if wallet_address:
@@ -265,44 +328,74 @@ class Web3GameMode:
             print(f"[web3] Connect wallet in browser → {connect_url}")
             instance._set_permanent("⏳ Web3: connect Freighter in browser…", ok=False)
             instance._set_status(f"Opened: {connect_url}", ok=False, seconds=15)
-
-            def _poll_wallet():
-                deadline = time.time() + 300   # 5-minute window
-                while time.time() < deadline:
-                    try:
-                        acct = bridge.get_account_for_player(player_id)
-                        if acct.get("connected") and acct.get("address"):
-                            addr = acct["address"]
-                            instance.wallet_address = addr
-                            instance.player_secret = int(
-                                hashlib.sha256(addr.encode()).hexdigest()[:8], 16
-                            )
-                            print(f"[web3] Wallet connected: {addr}")
-                            instance._set_permanent(
-                                "✦ Web3 ON  " + addr[:8] + "…", ok=True
-                            )
-                            instance._set_status("✓ Wallet connected — Web3 active!", ok=True, seconds=5)
-                            # Flush any actions that were queued before wallet connected
-                            for fn in list(instance._pending_queue):
-                                threading.Thread(target=fn, daemon=True).start()
-                            instance._pending_queue.clear()
-                            return
-                    except Exception:
-                        pass
-                    time.sleep(2)
-                instance._set_status("✗ Wallet connect timed out — kills/tasks won't be recorded", ok=False, seconds=10)
-                instance._set_permanent("✦ Web3 OFF — wallet not connected", ok=False)
-
-            threading.Thread(target=_poll_wallet, daemon=True).start()
+            if instance._loop is not None:
+                asyncio.run_coroutine_threadsafe(instance._poll_wallet_async(), instance._loop)
+            else:
+                threading.Thread(target=instance._poll_wallet, daemon=True).start()
 
         return instance
 
+    def _poll_wallet(self):
+        deadline = time.monotonic() + _WALLET_WAIT_SECONDS
+        while not self._closed and time.monotonic() < deadline:
+            try:
+                # Returns as soon as the wallet connects (long-poll)
+                acct = self.bridge.await_account_connection(
+                    self.player_id, timeout=min(60.0, max(0.0, deadline - time.monotonic())),
+                )
+                if acct.get("connected") and acct.get("address"):
+                    self._wallet_connected(acct["address"])
+                    return
+            except Exception:
+                time.sleep(2)   # bridge hiccup — don't spin
+        if not self._closed:
+            self._wallet_timed_out()
+
+    async def _poll_wallet_async(self):
+        """_poll_wallet on the event loop, through async_bridge."""
+        deadline = time.monotonic() + _WALLET_WAIT_SECONDS
+        while not self._closed and time.monotonic() < deadline:
+            try:
+                acct = await self.async_bridge.await_account_connection(
+                    self.player_id, timeout=max(0.0, deadline - time.monotonic()),
+                )
+                if acct.get("connected") and acct.get("address"):
+                    self._wallet_connected(acct["address"])
+                    return
+            except Exception:
+                await asyncio.sleep(2)
+        if not self._closed:
+            self._wallet_timed_out()
+
+    def _wallet_connected(self, addr: str):
+        if self._closed:
+            return
+        self._set_wallet(addr)
+        print(f"[web3] Wallet connected: {addr}")
+        self._set_permanent("✦ Web3 ON  " + addr[:8] + "…", ok=True)
+        self._set_status("✓ Wallet connected — Web3 active!", ok=True, seconds=5)
+        # Flush any actions that were queued before wallet connected
+        with self._pending_lock:
+            pending, self._pending_queue = self._pending_queue, []
+        for fn in pending:
+            self._io_pool.submit(fn)
+
+    def _wallet_timed_out(self):
+        self._set_status("✗ Wallet connect timed out — kills/tasks won't be recorded", ok=False, seconds=10)
+        self._set_permanent("✦ Web3 OFF — wallet not connected", ok=False)
+
+    def _set_wallet(self, address: str):
+        self._addr_bytes = address.encode()
+        # First 4 bytes of sha256(address), big-endian
+        self.player_secret = int.from_bytes(hashlib.sha256(self._addr_bytes).digest()[:4], "big")
+        self.wallet_address = address
+
     # ── status helpers ─────────────────────────────────────────────────────────
 
     def _set_status(self, msg: str, ok: bool = True, seconds: float = 4.0):
         self.status_message = msg
         self.status_ok = ok
-        self._status_until = time.time() + seconds
+        self._status_until = time.monotonic() + seconds
 
     def _set_permanent(self, msg: str, ok: bool = True):
         """Always-visible one-liner at top of HUD (separate from toast)."""
@@ -311,62 +404,202 @@ class Web3GameMode:
 
     def tick(self):
         """Call once per game-loop frame to expire status toasts."""
-        if self.status_message and time.time() > self._status_until:
+        if self.status_message and time.monotonic() > self._status_until:
             self.status_message = None
 
+    def close(self):
+        """
+        Stop the worker pools and the event loop; work not yet started is
+        dropped and game hooks called afterwards do nothing.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        with self._task_lock:
+            if self._task_flush_timer is not None:
+                self._task_flush_timer.cancel()
+                self._task_flush_timer = None
+            self._task_buffer = []
+        self._proof_pool.shutdown()
+        self._io_pool.shutdown()
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._close_async(), self._loop)
+
+    async def _close_async(self):
+        # Cancel sign-request waits and the wallet poll first, so none of
+        # them is left mid-request when the session closes under it.
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.async_bridge.close()
+        asyncio.get_running_loop().stop()
+
+    # ── proof pipeline ─────────────────────────────────────────────────────────
+
+    def _claim(self, nullifier: str) -> Optional[Future]:
+        """
+        Register `nullifier` as in flight. Returns the Future to settle when
+        its proof is done, or None if the same nullifier is already in flight.
+        """
+        with self._inflight_lock:
+            if nullifier in self._inflight:
+                return None
+            claim = self._inflight[nullifier] = Future()
+        claim.add_done_callback(lambda _: self._release(nullifier))
+        return claim
+
+    def _release(self, nullifier: str):
+        with self._inflight_lock:
+            self._inflight.pop(nullifier, None)
+
+    def _run_proof(self, label: str, claim: Future, prove: Callable, submit: Callable):
+        """
+        Run prove() on the proof pool, then submit(result) on the I/O pool
+        so XDR simulation and bridge round-trips never hold a prover slot.
+        Failures in either step surface as a "✗ <label>" toast. `claim`
+        (from _claim) is settled when the transaction submit() dispatches
+        (the Future it returns) settles, or when submit() returns None.
+        """
+        def _submit(result):
+            try:
+                dispatched = submit(result)
+            except Exception as exc:
+                self._set_status(f"✗ {label}: {exc}", ok=False, seconds=8)
+                claim.set_exception(exc)
+                return
+            if dispatched is None:
+                claim.set_result(None)
+            else:
+                _chain_future(dispatched, claim)
+
+        def _on_proved(fut):
+            if self._closed:
+                claim.set_result(None)
+                return
+            exc = fut.exception()
+            if exc is not None:
+                self._set_status(f"✗ {label}: {exc}", ok=False, seconds=8)
+                claim.set_exception(exc)
+                return
+            self._io_pool.submit(_submit, fut.result())
+
+        if self._closed:
+            claim.set_result(None)
+            return
+        self._proof_pool.submit(prove).add_done_callback(_on_proved)
+
     # ── async action dispatcher ────────────────────────────────────────────────
 
-    def _dispatch(self, action: str, xdr: str, metadata: dict):
+    def _dispatch(self, action: str, xdr: str, metadata: dict) -> Future:
         """
-        Fire-and-forget: sign + submit in a background thread.
-        Result (TX hash or error) surfaces via status_message.
+        Sign + submit, as a coroutine on the event loop when async_bridge is
+        set, else on the I/O pool. Result (TX hash or error) surfaces via
+        status_message. The returned Future resolves to submit_signed_xdr()'s
+        {"hash", "status"} once the transaction is on its way, or to None if
+        nothing was submitted (rejected, failed, or proof-only mode).
         If wallet isn't connected yet, queues for later replay.
         """
-        if not self.wallet_address:
-            self._set_status(f"⚠ {action}: waiting for wallet — connect Freighter in browser", ok=False, seconds=6)
-            return
+        if self._closed:
+            outcome = Future()
+            outcome.set_result(None)
+            return outcome
+        # Checked under the lock: _poll_wallet sets the address before it
+        # swaps the queue out, so nothing appended here can be missed.
+        with self._pending_lock:
+            if self.wallet_address:
+                return self._send(action, xdr, metadata)
+            outcome = Future()
+            self._pending_queue.append(
+                lambda: _chain_future(self._send(action, xdr, metadata), outcome)
+            )
+        self._set_status(f"⚠ {action}: queued until wallet connects — approve Freighter in browser", ok=False, seconds=6)
+        return outcome
 
-        def _run():
-            try:
-                self._set_status(f"⏳ {action}: awaiting wallet signature…", ok=True, seconds=120)
-                req = self.bridge.create_sign_request(
-                    player_id=self.player_id,
-                    action=action,
-                    xdr=xdr,
-                    network_passphrase=self.network_passphrase,
-                    metadata=metadata,
-                    open_browser=True,
-                )
-                rid = req.get("requestId")
-                if not rid:
-                    self._set_status(f"✗ {action}: bridge error — {req}", ok=False)
-                    return
+    def _send(self, action: str, xdr: str, metadata: dict) -> Future:
+        if self._loop is not None:
+            return asyncio.run_coroutine_threadsafe(self._dispatch_async(action, xdr, metadata), self._loop)
+        return self._io_pool.submit(self._dispatch_sync, action, xdr, metadata)
 
-                result = self.bridge.wait_for_signed_request(rid, timeout_seconds=120)
-                if not result.get("ok"):
-                    self._set_status(f"✗ {action}: {result.get('error','unknown')}", ok=False)
-                    return
+    def _dispatch_sync(self, action: str, xdr: str, metadata: dict) -> Optional[dict]:
+        try:
+            self._set_status(f"⏳ {action}: awaiting wallet signature…", ok=True, seconds=120)
+            req = self.bridge.create_sign_request(
+                player_id=self.player_id,
+                action=action,
+                xdr=xdr,
+                network_passphrase=self.network_passphrase,
+                metadata=metadata,
+                open_browser=True,
+            )
+            rid = req.get("requestId")
+            if not rid:
+                self._set_status(f"✗ {action}: bridge error — {req}", ok=False)
+                return None
+
+            result = self.bridge.wait_for_signed_request_longpoll(rid, timeout_seconds=120)
+            signed_xdr = self._signed_xdr(action, result)
+            if signed_xdr is None:
+                return None
+            return self._submit_signed(action, signed_xdr)
+        except Exception as exc:
+            self._set_status(f"✗ {action}: {exc}", ok=False, seconds=8)
+            return None
 
-                req_obj = result["request"]
-                if req_obj["status"] != "signed":
-                    self._set_status(f"✗ {action}: rejected by wallet", ok=False)
-                    return
+    async def _dispatch_async(self, action: str, xdr: str, metadata: dict) -> Optional[dict]:
+        try:
+            self._set_status(f"⏳ {action}: awaiting wallet signature…", ok=True, seconds=120)
+            req = await self.async_bridge.create_sign_request(
+                player_id=self.player_id,
+                action=action,
+                xdr=xdr,
+                network_passphrase=self.network_passphrase,
+                metadata=metadata,
+                open_browser=True,
+            )
+            rid = req.get("requestId")
+            if not rid:
+                self._set_status(f"✗ {action}: bridge error — {req}", ok=False)
+                return None
+
+            result = await self.async_bridge.wait_for_signed_request_longpoll(rid, timeout_seconds=120)
+            signed_xdr = self._signed_xdr(action, result)
+            if signed_xdr is None:
+                return None
+            # The Stellar RPC client blocks; keep it off the event loop.
+            return await asyncio.wrap_future(self._io_pool.submit(self._submit_signed, action, signed_xdr))
+        except Exception as exc:
+            self._set_status(f"✗ {action}: {exc}", ok=False, seconds=8)
+            return None
 
-                signed_xdr = req_obj["signedXdr"]
-                if self.stellar is not None:
-                    sub = self.stellar.submit_signed_xdr(signed_xdr)
-                    self._set_status(f"✓ {action} on-chain  tx={sub['hash'][:12]}…", ok=True)
-                else:
-                    self._set_status(f"✓ {action} signed (proof-only — no contract deployed)", ok=True)
-            except Exception as exc:
-                self._set_status(f"✗ {action}: {exc}", ok=False, seconds=8)
+    def _signed_xdr(self, action: str, result: dict) -> Optional[str]:
+        """Signed XDR from a finished sign-request wait, or None after a ✗ toast."""
+        if not result.get("ok"):
+            self._set_status(f"✗ {action}: {result.get('error','unknown')}", ok=False)
+            return None
+        req_obj = result["request"]
+        if req_obj["status"] != "signed":
+            self._set_status(f"✗ {action}: rejected by wallet", ok=False)
+            return None
+        return req_obj["signedXdr"]
 
-        threading.Thread(target=_run, daemon=True).start()
+    def _submit_signed(self, action: str, signed_xdr: str) -> Optional[dict]:
+        if self.stellar is None:
+            self._set_status(f"✓ {action} signed (proof-only — no contract deployed)", ok=True)
+            return None
+        sub = self.stellar.submit_signed_xdr(signed_xdr)
+        if sub["status"] == "ERROR":
+            self._set_status(f"✗ {action}: rejected by RPC  tx={sub['hash'][:12]}…", ok=False, seconds=8)
+            return None
+        self._set_status(f"✓ {action} on-chain  tx={sub['hash'][:12]}…", ok=True)
+        return sub
 
     # ── game action hooks ──────────────────────────────────────────────────────
 
     def _require_wallet(self, action: str) -> bool:
         """Return True if wallet is ready. Show toast and return False if not."""
+        if self._closed:
+            return False
         if not self.wallet_address or self.player_secret is None:
             self._set_status(
                 f"⚠ {action}: wallet not connected — approve Freighter in browser",
@@ -383,66 +616,173 @@ class Web3GameMode:
         secret = self.player_secret
         player_hash = hashlib.sha256(f"{addr}:{color}:{name}".encode()).hexdigest()
         role_hash = hashlib.sha256(f"role:{secret}:{self.round_id}".encode()).hexdigest()
+        if not self.stellar:
+            # Nothing to build or send — no need for a worker
+            self._set_status("✓ Player registered (proof-only mode)", ok=True)
+            return
         self._set_status("⏳ Registering player on-chain…", ok=True, seconds=10)
 
         def _go():
             try:
-                if self.stellar:
-                    xdr = self.stellar.build_join_xdr(addr, color, name, player_hash, role_hash)
-                    self._dispatch("join_game", xdr, {"color": color, "name": name})
-                else:
-                    self._set_status("✓ Player registered (proof-only mode)", ok=True)
+                # build_*_xdr simulates over RPC, so it stays off the game loop
+                xdr = self.stellar.build_join_xdr(addr, color, name, player_hash, role_hash)
+                self._dispatch("join_game", xdr, {"color": color, "name": name})
             except Exception as exc:
                 self._set_status(f"✗ join_game: {exc}", ok=False, seconds=8)
 
-        threading.Thread(target=_go, daemon=True).start()
+        self._io_pool.submit(_go)
 
     def on_move(self, x: int, y: int):
         """Silently skipped — move spam would flood the chain."""
         pass
 
     def on_task_complete(self, task_id: int):
-        """Call when a crewmate completes a task."""
+        """
+        Call when a crewmate completes a task. Completions within
+        _TASK_BATCH_WINDOW of each other go out as one transaction.
+        """
+        if not self._require_wallet("submit_task_proof"):
+            return
+        secret = self.player_secret
+        round_id = self.round_id
+        task_secret = (secret ^ task_id) & 0xFFFFFFFF
+        claim = self._claim(_nullifier_hex(_task_commitment(task_id, task_secret, secret, round_id)[1]))
+        if claim is None:   # this task's proof is already on its way
+            return
         # Show immediate feedback so the player sees SOMETHING right away
         self._set_status(f"🔐 Task {task_id}: generating ZK proof…", ok=True, seconds=15)
-        if not self._require_wallet("submit_task_proof"):
+        with self._task_lock:
+            self._task_buffer.append((task_id, round_id, claim))
+            # Armed by the first task of a window and not pushed back by later
+            # ones, so a steady stream of tasks still flushes every window.
+            if self._task_flush_timer is None:
+                self._task_flush_timer = threading.Timer(_TASK_BATCH_WINDOW, self._flush_tasks)
+                self._task_flush_timer.daemon = True
+                self._task_flush_timer.start()
+
+    def _prove_task(self, task_id: int, secret: int, round_id: int):
+        """Return (proof_hash_hex, nullifier_hex, public_inputs_hex) for one task."""
+        task_secret = (secret ^ task_id) & 0xFFFFFFFF
+        if self._nargo_available:
+            proof_hash, nullifier = _make_task_proof(
+                self._proof_backend, self._circuit_paths["task_proof"], task_id, task_secret, secret, round_id,
+            )
+            public_inputs = [f"{task_id & 0xFFFFFFFF:064x}"]
+        else:
+            proof_hash = hashlib.sha256(
+                f"task:{task_id}:{task_secret}:{secret}".encode()
+            ).hexdigest()
+            nullifier = _nullifier_hex(_task_commitment(task_id, task_secret, secret, round_id)[1])
+            public_inputs = [f"{round_id:064x}"]
+        return proof_hash, nullifier, public_inputs
+
+    def _flush_tasks(self):
+        if self._closed:
+            return
+        with self._task_lock:
+            batch, self._task_buffer = self._task_buffer, []
+            self._task_flush_timer = None
+        if not batch:
             return
         addr = self.wallet_address
         secret = self.player_secret
-        round_id = self.round_id
+
+        if len(batch) == 1:
+            task_id, round_id, claim = batch[0]
+
+            def _submit(proof):
+                if self.stellar:
+                    xdr = self.stellar.build_task_xdr(addr, *proof)
+                    return self._dispatch("submit_task_proof", xdr, {"task_id": task_id})
+                self._set_status(f"✓ Task {task_id} proof generated (proof-only mode)", ok=True)
+                return None
+
+            self._run_proof("task_proof", claim, lambda: self._prove_task(task_id, secret, round_id), _submit)
+            return
+
+        # Each task is still its own proof (the circuits prove one task), but
+        # they prove in parallel and share one transaction / wallet prompt.
+        task_ids = [task_id for task_id, _, _ in batch]
+        futures = [
+            self._proof_pool.submit(self._prove_task, task_id, secret, round_id)
+            for task_id, round_id, _ in batch
+        ]
 
         def _go():
+            dispatched = None
             try:
-                if self._nargo_available:
-                    task_secret = (secret ^ task_id) & 0xFFFFFFFF
-                    proof_hash, nullifier = _make_task_proof(
-                        self.circuits_root, task_id, task_secret, secret, round_id,
-                    )
-                    public_inputs = [format(task_id & 0xFFFFFFFF, "064x")]
-                else:
-                    task_secret = (secret ^ task_id) & 0xFFFFFFFF
-                    raw_nullifier = secret * 41 + task_id * 13 + round_id * 101
-                    proof_hash = hashlib.sha256(
-                        f"task:{task_id}:{task_secret}:{secret}".encode()
-                    ).hexdigest()
-                    nullifier = format(raw_nullifier & ((1 << 64) - 1), "064x")
-                    public_inputs = [format(round_id, "064x")]
-
+                proofs = [fut.result() for fut in futures]
                 if self.stellar:
-                    xdr = self.stellar.build_task_xdr(addr, proof_hash, nullifier, public_inputs)
-                    self._dispatch("submit_task_proof", xdr, {"task_id": task_id})
+                    xdr = self.stellar.build_tasks_xdr(addr, proofs)
+                    if xdr is not None:
+                        dispatched = self._dispatch("submit_task_proofs", xdr, {"task_ids": task_ids})
+                    else:
+                        dispatched = self._submit_tasks_in_turn(addr, task_ids, proofs)
                 else:
-                    self._set_status(f"✓ Task {task_id} proof generated (proof-only mode)", ok=True)
+                    ids = ", ".join(str(task_id) for task_id in task_ids)
+                    self._set_status(f"✓ Tasks {ids} proofs generated (proof-only mode)", ok=True)
+            except Exception as exc:
+                self._set_status(f"✗ task_proof: {exc}", ok=False, seconds=8)
+            finally:
+                # Held until the batch transaction (or the last of the
+                # one-at-a-time ones) settles.
+                for _, _, claim in batch:
+                    if dispatched is None:
+                        claim.set_result(None)
+                    else:
+                        _chain_future(dispatched, claim)
+
+        self._io_pool.submit(_go)
+
+    def _submit_tasks_in_turn(self, addr: str, task_ids: list, proofs: list) -> Future:
+        """
+        One submit_task_proof transaction per task, for contracts without
+        submit_task_proofs. Each is built after the previous one is in a
+        ledger, so it simulates against the account's next sequence number.
+
+        The steps are chained through done-callbacks rather than waited on:
+        the dispatch futures settle on `_io_pool`, so a worker blocking on one
+        could starve the pool. Returns a future that settles after the last.
+        """
+        done: Future = Future()
+        steps = list(zip(task_ids, proofs))
+
+        def _step(i: int):
+            if i == len(steps) or self._closed:
+                done.set_result(None)
+                return
+            task_id, proof = steps[i]
+            try:
+                xdr = self.stellar.build_task_xdr(addr, *proof)
             except Exception as exc:
                 self._set_status(f"✗ task_proof: {exc}", ok=False, seconds=8)
+                _step(i + 1)
+                return
+            self._dispatch("submit_task_proof", xdr, {"task_id": task_id}).add_done_callback(
+                lambda fut: _next(i, fut)
+            )
 
-        threading.Thread(target=_go, daemon=True).start()
+        def _next(i: int, fut: Future):
+            try:
+                self._io_pool.submit(_landed, i, fut)
+            except RuntimeError:  # closed while the transaction was out
+                done.set_result(None)
+
+        def _landed(i: int, fut: Future):
+            sub = None if fut.cancelled() or fut.exception() is not None else fut.result()
+            if sub is not None:
+                try:
+                    self.stellar.wait_for_transaction(sub["hash"])
+                except Exception as exc:
+                    print(f"[web3] WARNING: waiting for {sub['hash']} failed: {exc}")
+            _step(i + 1)
+
+        _step(0)
+        return done
 
     def on_kill(self, killer_x: int, killer_y: int,
                 victim_x: int, victim_y: int, victim_wallet: str):
         """Call after the imposter kills a player/bot."""
-        # Immediate visible feedback — user sees this instantly
-        self._set_status("🔐 Kill: generating ZK proof…", ok=True, seconds=15)
         if not self._require_wallet("submit_kill_proof"):
             return
         addr = self.wallet_address
@@ -450,86 +790,96 @@ class Web3GameMode:
         round_id = self.round_id
         dx = killer_x - victim_x
         dy = killer_y - victim_y
+        claim = self._claim(_nullifier_hex(_kill_commitment(dx, dy, secret, round_id)[1]))
+        if claim is None:
+            # The kill nullifier is per round, so this round's kill is already
+            # being proven or is waiting on the wallet; the contract would
+            # reject a second one anyway.
+            self._set_status("✗ Kill: this round's kill proof is already pending", ok=False, seconds=4)
+            return
+        # Immediate visible feedback — user sees this instantly
+        self._set_status("🔐 Kill: generating ZK proof…", ok=True, seconds=15)
 
-        def _go():
-            try:
-                if self._nargo_available:
-                    proof_hash, nullifier = _make_kill_proof(
-                        self.circuits_root, dx, dy, secret, round_id,
-                    )
-                    public_inputs = [format(round_id, "064x")]
-                else:
-                    raw_nullifier = secret * 67 + round_id * 17
-                    proof_hash = hashlib.sha256(
-                        f"kill:{dx}:{dy}:{secret}:{round_id}".encode()
-                    ).hexdigest()
-                    nullifier = format(raw_nullifier & ((1 << 64) - 1), "064x")
-                    public_inputs = [format(round_id, "064x")]
-
-                if self.stellar:
-                    xdr = self.stellar.build_kill_xdr(
-                        killer_address=addr,
-                        victim_address=victim_wallet,
-                        proof_hash_hex=proof_hash,
-                        nullifier_hex=nullifier,
-                        public_inputs_hex=public_inputs,
-                    )
-                    self._dispatch("submit_kill_proof", xdr, {"victim": victim_wallet[:8]})
-                else:
-                    self._set_status(f"✓ Kill proof generated (proof-only mode)  hash={proof_hash[:10]}…", ok=True)
-            except Exception as exc:
-                self._set_status(f"✗ kill_proof: {exc}", ok=False, seconds=8)
+        def _prove():
+            if self._nargo_available:
+                proof_hash, nullifier = _make_kill_proof(
+                    self._proof_backend, self._circuit_paths["kill_proof"], dx, dy, secret, round_id,
+                )
+                public_inputs = [f"{round_id:064x}"]
+            else:
+                proof_hash = hashlib.sha256(
+                    f"kill:{dx}:{dy}:{secret}:{round_id}".encode()
+                ).hexdigest()
+                nullifier = _nullifier_hex(_kill_commitment(dx, dy, secret, round_id)[1])
+                public_inputs = [f"{round_id:064x}"]
+            return proof_hash, nullifier, public_inputs
+
+        def _submit(proof):
+            proof_hash, nullifier, public_inputs = proof
+            if self.stellar:
+                xdr = self.stellar.build_kill_xdr(
+                    killer_address=addr,
+                    victim_address=victim_wallet,
+                    proof_hash_hex=proof_hash,
+                    nullifier_hex=nullifier,
+                    public_inputs_hex=public_inputs,
+                )
+                return self._dispatch("submit_kill_proof", xdr, {"victim": victim_wallet[:8]})
+            self._set_status(f"✓ Kill proof generated (proof-only mode)  hash={proof_hash[:10]}…", ok=True)
+            return None
 
-        threading.Thread(target=_go, daemon=True).start()
+        self._run_proof("kill_proof", claim, _prove, _submit)
 
     def on_vote(self, target_index: int, target_wallet: str):
         """Call when the player casts a vote in an emergency meeting."""
         self.meeting_round += 1
-        self._set_status("🔐 Vote: generating ZK proof…", ok=True, seconds=15)
         if not self._require_wallet("submit_vote"):
             return
         addr = self.wallet_address
         secret = self.player_secret
         meeting_round = self.meeting_round
+        claim = self._claim(_nullifier_hex(_vote_commitment(target_index, secret, meeting_round)[1]))
+        if claim is None:   # this meeting's vote proof is already on its way
+            return
+        self._set_status("🔐 Vote: generating ZK proof…", ok=True, seconds=15)
 
-        def _go():
-            try:
-                if self._nargo_available:
-                    proof_hash, nullifier = _make_vote_proof(
-                        self.circuits_root, target_index, secret, meeting_round,
-                    )
-                else:
-                    raw_nullifier = secret * 53 + meeting_round * 11
-                    proof_hash = hashlib.sha256(
-                        f"vote:{target_index}:{secret}:{meeting_round}".encode()
-                    ).hexdigest()
-                    nullifier = format(raw_nullifier & ((1 << 64) - 1), "064x")
-
-                target_hash = hashlib.sha256(target_wallet.encode()).hexdigest()
-                if self.stellar:
-                    xdr = self.stellar.build_vote_xdr(addr, target_hash, proof_hash, nullifier)
-                    self._dispatch("submit_vote", xdr, {"target_index": target_index})
-                else:
-                    self._set_status(f"✓ Vote proof generated (proof-only mode)", ok=True)
-            except Exception as exc:
-                self._set_status(f"✗ vote_proof: {exc}", ok=False, seconds=8)
+        def _prove():
+            if self._nargo_available:
+                proof_hash, nullifier = _make_vote_proof(
+                    self._proof_backend, self._circuit_paths["vote_proof"], target_index, secret, meeting_round,
+                )
+            else:
+                proof_hash = hashlib.sha256(
+                    f"vote:{target_index}:{secret}:{meeting_round}".encode()
+                ).hexdigest()
+                nullifier = _nullifier_hex(_vote_commitment(target_index, secret, meeting_round)[1])
+            return proof_hash, nullifier
+
+        def _submit(proof):
+            proof_hash, nullifier = proof
+            target_hash = hashlib.sha256(target_wallet.encode()).hexdigest()
+            if self.stellar:
+                xdr = self.stellar.build_vote_xdr(addr, target_hash, proof_hash, nullifier)
+                return self._dispatch("submit_vote", xdr, {"target_index": target_index})
+            self._set_status(f"✓ Vote proof generated (proof-only mode)", ok=True)
+            return None
 
-        threading.Thread(target=_go, daemon=True).start()
+        self._run_proof("vote_proof", claim, _prove, _submit)
 
     def on_meeting_start(self):
         """Call when an emergency meeting button is pressed."""
         if not self._require_wallet("start_meeting"):
             return
+        if not self.stellar:
+            self._set_status("✓ Meeting started (proof-only mode)", ok=True)
+            return
         addr = self.wallet_address
 
         def _go():
             try:
-                if self.stellar:
-                    xdr = self.stellar.build_meeting_xdr(addr)
-                    self._dispatch("start_meeting", xdr, {})
-                else:
-                    self._set_status("✓ Meeting started (proof-only mode)", ok=True)
+                xdr = self.stellar.build_meeting_xdr(addr)
+                self._dispatch("start_meeting", xdr, {})
             except Exception as exc:
                 self._set_status(f"✗ start_meeting: {exc}", ok=False, seconds=8)
 
-        threading.Thread(target=_go, daemon=True).start()
+        self._io_pool.submit(_go)